@@ -1,11 +1,19 @@
 import boto3
 import csv
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime, timedelta, timezone
 
 # Config
 REGION = "ap-south-1"   # Change to your AWS region
 OUTPUT_FILE = "ebs_usage_report.csv"
 DAYS = 30
+GRANULARITY = None      # "daily" or "hourly" for per-period profiles; None for a single 30-day Sum per volume
+PERIODS = {"daily": 86400, "hourly": 3600}
+PROFILE_METRICS = ["VolumeReadOps", "VolumeWriteOps", "VolumeReadBytes", "VolumeWriteBytes"]
+PEAK_METRICS = ["VolumeReadOps", "VolumeWriteOps"]  # also fetched as per-period Maximum
+HDD_VOLUME_TYPES = ["st1", "sc1"]  # throughput-optimised; no IOPS baseline to judge against
+SAMPLE_SECONDS = 60  # EBS reports one data point per minute, so Maximum / 60 is the busiest minute's IOPS
+MAX_QUERIES_PER_CALL = 500  # get_metric_data limit
 
 # Initialize clients
 ec2 = boto3.client("ec2", region_name=REGION)
@@ -30,7 +38,217 @@ def get_metric_sum(volume_id, metric_name):
         return datapoints[0]["Sum"]
     return 0
 
+def get_metric_matrices(volume_ids, period):
+    """
+    Fetch per-period Sums of PROFILE_METRICS and Maximums of PEAK_METRICS for all
+    volumes with batched get_metric_data
+
+    Returns:
+    tuple: (dict metric -> volumes-by-time NumPy matrix, with the read and write
+            Maximums added up under "PeakOps"; list of period start datetimes)
+    """
+    # Align to period boundaries so every volume shares the same time axis
+    aligned_end = datetime.fromtimestamp(int(end_time.replace(tzinfo=timezone.utc).timestamp()) // period * period, timezone.utc)
+    n_periods = DAYS * 86400 // period
+    aligned_start = aligned_end - timedelta(seconds=n_periods * period)
+    start_ts = aligned_start.timestamp()
+
+    stats = [(metric, "Sum") for metric in PROFILE_METRICS] + [(metric, "Maximum") for metric in PEAK_METRICS]
+    # Sums stay float64 so op and byte totals are exact; the peaks only feed the
+    # right-sizing hint, so float32 is enough there
+    matrices = {metric: np.zeros((len(volume_ids), n_periods)) for metric in PROFILE_METRICS}
+    matrices["PeakOps"] = np.zeros((len(volume_ids), n_periods), dtype=np.float32)
+    queries = [
+        (v, stat) for v in range(len(volume_ids)) for stat in stats
+    ]
+    paginator = cloudwatch.get_paginator("get_metric_data")
+
+    for batch_start in range(0, len(queries), MAX_QUERIES_PER_CALL):
+        batch = queries[batch_start:batch_start + MAX_QUERIES_PER_CALL]
+        metric_queries = [
+            {
+                "Id": f"q{batch_start + i}",
+                "MetricStat": {
+                    "Metric": {
+                        "Namespace": "AWS/EBS",
+                        "MetricName": metric,
+                        "Dimensions": [{"Name": "VolumeId", "Value": volume_ids[v]}],
+                    },
+                    "Period": period,
+                    "Stat": stat,
+                },
+                "ReturnData": True,
+            }
+            for i, (v, (metric, stat)) in enumerate(batch)
+        ]
+
+        for page in paginator.paginate(MetricDataQueries=metric_queries,
+                                       StartTime=aligned_start, EndTime=aligned_end):
+            for result in page["MetricDataResults"]:
+                v, (metric, stat) = queries[int(result["Id"][1:])]
+                if not result["Values"]:
+                    continue
+                stamps = np.array([ts.timestamp() for ts in result["Timestamps"]])
+                slots = ((stamps - start_ts) // period).astype(int)
+                valid = (slots >= 0) & (slots < n_periods)
+                values = np.asarray(result["Values"])[valid]
+                if stat == "Maximum":
+                    matrices["PeakOps"][v, slots[valid]] += values
+                else:
+                    matrices[metric][v, slots[valid]] = values
+
+    period_starts = [aligned_start + timedelta(seconds=i * period) for i in range(n_periods)]
+    return matrices, period_starts
+
+def compute_usage_profiles(matrices, sizes, volume_types, provisioned_iops, period):
+    """
+    Per-volume usage statistics computed in bulk over the volumes-by-time matrices
+
+    Average IOPS and throughput are per-period Sums divided by the period; the
+    right-sizing hint uses the busiest minute of each period instead, since
+    daily averages sit far below any volume's baseline.
+
+    Returns:
+    dict: column name -> NumPy array (one entry per volume)
+    """
+    read_ops = matrices["VolumeReadOps"]
+    write_ops = matrices["VolumeWriteOps"]
+    read_bytes = matrices["VolumeReadBytes"]
+    write_bytes = matrices["VolumeWriteBytes"]
+    ops = read_ops + write_ops
+    total_bytes = read_bytes + write_bytes
+    active = ops > 0
+    n_periods = ops.shape[1]
+
+    idle_periods = n_periods - active.sum(axis=1)
+    # Index of the last active period, -1 if never active
+    last_active = np.where(active.any(axis=1), n_periods - 1 - np.argmax(active[:, ::-1], axis=1), -1)
+    iops = ops / period
+    p95_iops = np.percentile(iops, 95, axis=1)
+    p95_throughput_mib = np.percentile(total_bytes / period, 95, axis=1) / (1024 * 1024)
+    # Read and write peaks may fall in different minutes, so their sum is an upper bound
+    peak_iops = matrices["PeakOps"] / SAMPLE_SECONDS
+    p95_peak_iops = np.percentile(peak_iops, 95, axis=1)
+
+    # Provisioned Iops when the volume reports it (gp3, io1, io2, gp2); otherwise
+    # gp2's 3 IOPS/GiB (min 100) or 3000. st1/sc1 are sized for throughput, so
+    # they get no IOPS baseline and no IOPS-based hint
+    sizes = np.asarray(sizes, dtype=float)
+    volume_types = np.asarray(volume_types)
+    is_gp2 = volume_types == "gp2"
+    is_hdd = np.isin(volume_types, HDD_VOLUME_TYPES)
+    default_iops = np.where(is_gp2, np.maximum(100, 3 * sizes), 3000)
+    provisioned_iops = np.array([np.nan if iops is None else iops for iops in provisioned_iops], dtype=float)
+    baseline_iops = np.where(provisioned_iops > 0, provisioned_iops, default_iops)
+    baseline_iops[is_hdd] = np.nan
+    utilisation = p95_peak_iops / baseline_iops
+
+    hints = np.select(
+        [
+            ~active.any(axis=1),
+            idle_periods >= n_periods * 0.9,
+            is_hdd,
+            (utilisation < 0.1) & is_gp2 & (sizes > 334),
+            utilisation < 0.1,
+            utilisation > 0.9,
+        ],
+        [
+            "Unused - snapshot and delete",
+            "Rarely used - snapshot and delete or move to sc1",
+            "Throughput-optimised HDD - review P95ThroughputMiBps",
+            "Over-provisioned for IOPS - move to gp3 and shrink",
+            "Low utilisation - consider smaller or cheaper volume type",
+            "Near IOPS baseline - consider gp3/io2 with provisioned IOPS",
+        ],
+        default="Right-sized",
+    )
+
+    return {
+        "ReadOps": read_ops.sum(axis=1, dtype=np.float64),
+        "WriteOps": write_ops.sum(axis=1, dtype=np.float64),
+        "ReadBytes": read_bytes.sum(axis=1, dtype=np.float64),
+        "WriteBytes": write_bytes.sum(axis=1, dtype=np.float64),
+        "IdlePeriods": idle_periods,
+        "LastActiveIndex": last_active,
+        "P95AvgIOPS": p95_iops,
+        "P95PeakIOPS": p95_peak_iops,
+        "BaselineIOPS": baseline_iops,
+        "P95ThroughputMiBps": p95_throughput_mib,
+        "RightSizingHint": hints,
+    }
+
+def describe_all_volumes():
+    """List every volume in the region (describe_volumes is paginated)"""
+    volumes = []
+    for page in ec2.get_paginator("describe_volumes").paginate():
+        volumes.extend(page["Volumes"])
+    return volumes
+
+def profile_main(granularity):
+    """Usage report with per-period profiles for every volume"""
+    period = PERIODS[granularity]
+    volumes = describe_all_volumes()
+    volume_ids = [vol["VolumeId"] for vol in volumes]
+
+    matrices, period_starts = get_metric_matrices(volume_ids, period)
+    profiles = compute_usage_profiles(
+        matrices,
+        [vol["Size"] for vol in volumes],
+        [vol.get("VolumeType", "") for vol in volumes],
+        [vol.get("Iops") for vol in volumes],
+        period
+    )
+
+    label_format = "%Y-%m-%d" if granularity == "daily" else "%Y-%m-%d %H:00"
+    fieldnames = [
+        "VolumeId", "State", "Size", "VolumeType", "AZ", "ReadOps", "WriteOps", "UsageStatus",
+        "ReadBytes", "WriteBytes", "IdlePeriods", "ActivePeriods", "LastActive",
+        "P95AvgIOPS", "P95PeakIOPS", "BaselineIOPS", "P95ThroughputMiBps", "RightSizingHint"
+    ]
+
+    used_count = 0
+    unused_count = 0
+    with open(OUTPUT_FILE, mode="w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for i, vol in enumerate(volumes):
+            last_active = profiles["LastActiveIndex"][i]
+            if last_active < 0:
+                usage_status = "Not Used"
+                unused_count += 1
+            else:
+                usage_status = "Used"
+                used_count += 1
+
+            writer.writerow({
+                "VolumeId": vol["VolumeId"],
+                "State": vol["State"],
+                "Size": vol["Size"],
+                "VolumeType": vol.get("VolumeType", ""),
+                "AZ": vol["AvailabilityZone"],
+                "ReadOps": int(profiles["ReadOps"][i]),
+                "WriteOps": int(profiles["WriteOps"][i]),
+                "UsageStatus": usage_status,
+                "ReadBytes": int(profiles["ReadBytes"][i]),
+                "WriteBytes": int(profiles["WriteBytes"][i]),
+                "IdlePeriods": int(profiles["IdlePeriods"][i]),
+                "ActivePeriods": len(period_starts) - int(profiles["IdlePeriods"][i]),
+                "LastActive": period_starts[last_active].strftime(label_format) if last_active >= 0 else "",
+                "P95AvgIOPS": round(float(profiles["P95AvgIOPS"][i]), 2),
+                "P95PeakIOPS": round(float(profiles["P95PeakIOPS"][i]), 2),
+                "BaselineIOPS": "" if np.isnan(profiles["BaselineIOPS"][i]) else int(profiles["BaselineIOPS"][i]),
+                "P95ThroughputMiBps": round(float(profiles["P95ThroughputMiBps"][i]), 3),
+                "RightSizingHint": profiles["RightSizingHint"][i],
+            })
+
+    print(f"Report saved to {OUTPUT_FILE}")
+    print(f"Summary: {used_count} volumes USED, {unused_count} volumes NOT USED in last {DAYS} days ({granularity} profile).")
+
 def main():
+    if GRANULARITY:
+        profile_main(GRANULARITY)
+        return
+
     volumes = ec2.describe_volumes()["Volumes"]
 
     results = []
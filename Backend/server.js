@@ -45,24 +45,68 @@ Click Go. You will get latest job status as you can see below:
   }
 ];
 
+// Python BM25 suggestion engine (kedb_suggest.py), e.g. http://localhost:3002
+const SUGGEST_API_URL = process.env.KEDB_SUGGEST_URL;
+
 // Find suggested KEDBs
-app.post('/api/suggested-kedbs', (req, res) => {
-  const { description } = req.body;
+app.post('/api/suggested-kedbs', async (req, res) => {
+  const { description, limit = 10 } = req.body;
 
   console.log('Finding KEDBs for:', description);
 
+  if (SUGGEST_API_URL) {
+    try {
+      const response = await fetch(`${SUGGEST_API_URL}/api/suggested-kedbs`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ description, limit }),
+      });
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      res.json(await response.json());
+      return;
+    } catch (error) {
+      console.error('Suggestion engine call failed, using sample data:', error);
+    }
+  }
+
   // Simulate API delay
   setTimeout(() => {
-    res.json({ kedbs: sampleKedbs });
+    res.json({ kedbs: sampleKedbs.slice(0, limit) });
   }, 1500);
 });
 
+// Cached Python draft generator (kedb_generate.py), e.g. http://localhost:3003
+const GENERATE_API_URL = process.env.KEDB_GENERATE_URL;
+
 // Generate KEDB content
-app.post('/api/generate-kedb', (req, res) => {
+app.post('/api/generate-kedb', async (req, res) => {
   const { description } = req.body;
 
   console.log('Generating KEDB for:', description);
 
+  if (GENERATE_API_URL) {
+    try {
+      const response = await fetch(`${GENERATE_API_URL}/api/generate-kedb`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(req.body),
+      });
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      res.json(await response.json());
+      return;
+    } catch (error) {
+      console.error('Generation service call failed, using sample draft:', error);
+    }
+  }
+
   // Simulate API delay
   setTimeout(() => {
     const content = `**KEDB Draft**
@@ -1,93 +1,244 @@
 import pandas as pd
+import numpy as np
 import os
+import re
+import sys
+import glob
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import groupby
+import kedb_sql
+from kedb_io import read_excel_columns, read_kedb_excel
 
-def simple_kedb_duplicate_removal(input_file, output_file):
+# MinHash-LSH settings for near-duplicate collapsing
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 4
+NEAR_DUPLICATE_THRESHOLD = 0.7
+# Hashes and coefficients stay below 2^31, so a * x + b < 2^63 never overflows uint64
+_MERSENNE_PRIME = (1 << 31) - 1
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+def description_shingles(description):
+    """
+    Character shingles of a description with digits masked, so descriptions that
+    only differ by timestamps, job numbers or host suffixes share most shingles
+    """
+    text = re.sub(r'\d+', '0', description.lower())
+    text = re.sub(r'\s+', ' ', text).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(shingles):
+    """Compute the MinHash signature of a set of shingles"""
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode('utf-8')) % _MERSENNE_PRIME for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+    # (a * x + b) mod p for every permutation/shingle pair, then min per permutation
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+def collapse_near_duplicates(descriptions, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Collapse near-duplicate descriptions with MinHash-LSH
+
+    Each description is bucketed by the bands of its signature and only compared
+    with cluster representatives sharing a bucket, so the cost stays roughly
+    linear in the number of descriptions instead of pairwise.
+
+    Parameters:
+    descriptions (list): Descriptions in their original order
+    threshold (float): Minimum estimated Jaccard similarity to join a cluster
+
+    Returns:
+    list: (representative, count) tuples in first-seen order
+    """
+    rows_per_band = MINHASH_PERMUTATIONS // LSH_BANDS
+    buckets = {}
+    representatives = []
+    signatures = []
+    counts = []
+
+    for desc in descriptions:
+        signature = minhash_signature(description_shingles(desc))
+        band_keys = [
+            (band, signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes())
+            for band in range(LSH_BANDS)
+        ]
+
+        cluster = None
+        best_similarity = threshold
+        candidates = set()
+        for key in band_keys:
+            candidates.update(buckets.get(key, ()))
+        for candidate in candidates:
+            similarity = np.mean(signatures[candidate] == signature)
+            if similarity >= best_similarity:
+                cluster = candidate
+                best_similarity = similarity
+
+        if cluster is None:
+            cluster = len(representatives)
+            representatives.append(desc)
+            signatures.append(signature)
+            counts.append(0)
+            for key in band_keys:
+                buckets.setdefault(key, []).append(cluster)
+
+        counts[cluster] += 1
+
+    return list(zip(representatives, counts))
+
+def find_kedb_columns(columns):
+    """Find the KEDB and short description columns (case-insensitive search)"""
+    kedb_col = None
+    desc_col = None
+    
+    for col in columns:
+        col_lower = str(col).lower().strip()
+        if 'kedb' in col_lower:
+            kedb_col = col
+        if 'short' in col_lower and 'description' in col_lower:
+            desc_col = col
+    
+    return kedb_col, desc_col
+
+def clean_kedb_frame(df, kedb_col, desc_col):
+    """Keep the KEDB/short_description pairs with both values present and non-empty"""
+    # Strings are already stripped by read_kedb_excel
+    df_clean = df[[kedb_col, desc_col]].dropna(subset=[kedb_col, desc_col])
+    
+    # Rename columns for easier processing
+    df_clean.columns = ['KEDB', 'short_description']
+    
+    # Remove empty descriptions
+    df_clean = df_clean[df_clean['short_description'] != '']
+    df_clean = df_clean[df_clean['short_description'].str.lower() != 'nan']
+    df_clean = df_clean[df_clean['KEDB'] != '']
+    df_clean = df_clean[df_clean['KEDB'].str.lower() != 'nan']
+    
+    return df_clean
+
+def combine_unique_descriptions(descriptions, near_duplicates=False):
+    """
+    Remove duplicate descriptions (case-insensitive) while preserving order and
+    join them into one combined description
+    """
+    unique_descriptions = []
+    seen = set()
+    
+    for desc in descriptions:
+        desc_lower = desc.lower().strip()
+        if desc_lower not in seen and desc_lower:
+            unique_descriptions.append(desc.strip())
+            seen.add(desc_lower)
+    
+    if near_duplicates:
+        clusters = collapse_near_duplicates(unique_descriptions)
+        unique_descriptions = [
+            f"{desc} (x{count})" if count > 1 else desc
+            for desc, count in clusters
+        ]
+    
+    return ' - '.join(unique_descriptions)
+
+def iter_sql_kedb_groups(conn, table, kedb_col, desc_col):
+    """
+    Stream (KEDB, descriptions) groups from the embedded database, applying the
+    same cleaning as the pandas path one group at a time
+    """
+    rows = kedb_sql.iter_grouped_text(conn, table, kedb_col, desc_col)
+    for kedb, group in groupby(rows, key=lambda row: row[0]):
+        if kedb == '' or kedb.lower() == 'nan':
+            continue
+        descriptions = []
+        for _, desc in group:
+            desc = desc.strip()
+            if desc != '' and desc.lower() != 'nan':
+                descriptions.append(desc)
+        if descriptions:
+            yield kedb, descriptions
+
+def simple_kedb_duplicate_removal(input_file, output_file, near_duplicates=False, db_file=None):
     """
     Simple script to remove duplicate short descriptions by KEDB and combine them
+
+    With near_duplicates=True, descriptions that only differ by job suffixes,
+    timestamps or host names are collapsed into one representative with a count.
+    With db_file, the sheet is loaded into an embedded database once and grouped
+    with out-of-core SQL instead of in pandas memory.
     """
     
+    conn = None
     try:
-        # Read the Excel file
-        print("📊 Reading KEDB_inc.xlsx...")
-        df = pd.read_excel(input_file)
-        
-        print(f"📄 Loaded {len(df)} records")
-        print(f"📋 Columns found: {list(df.columns)}")
+        if db_file:
+            print(f"🗄️ Using database {db_file} for {input_file}...")
+            conn = kedb_sql.connect(db_file)
+            table, columns = kedb_sql.load_excel_table(conn, input_file)
+        else:
+            columns = read_excel_columns(input_file)
+        print(f"📋 Columns found: {columns}")
         
         # Find the correct column names (case-insensitive search)
-        kedb_col = None
-        desc_col = None
-        
-        for col in df.columns:
-            col_lower = col.lower().strip()
-            if 'kedb' in col_lower:
-                kedb_col = col
-                print(f"✅ Found KEDB column: '{col}'")
-            if 'short' in col_lower and 'description' in col_lower:
-                desc_col = col
-                print(f"✅ Found description column: '{col}'")
+        kedb_col, desc_col = find_kedb_columns(columns)
+        if kedb_col is not None:
+            print(f"✅ Found KEDB column: '{kedb_col}'")
+        if desc_col is not None:
+            print(f"✅ Found description column: '{desc_col}'")
         
         # Check if columns were found
         if kedb_col is None:
             print("❌ Error: No KEDB column found. Available columns:")
-            for i, col in enumerate(df.columns, 1):
+            for i, col in enumerate(columns, 1):
                 print(f"  {i}. {col}")
             return None
             
         if desc_col is None:
             print("❌ Error: No short_description column found. Available columns:")
-            for i, col in enumerate(df.columns, 1):
+            for i, col in enumerate(columns, 1):
                 print(f"  {i}. {col}")
             return None
         
         # Clean data using the found column names
         print(f"🔍 Using columns: KEDB='{kedb_col}', Description='{desc_col}'")
         
-        df_clean = df[[kedb_col, desc_col]].copy()
-        df_clean = df_clean.dropna(subset=[kedb_col, desc_col])
-        
-        # Rename columns for easier processing
-        df_clean.columns = ['KEDB', 'short_description']
-        
-        # Convert to string and clean
-        df_clean['KEDB'] = df_clean['KEDB'].astype(str).str.strip()
-        df_clean['short_description'] = df_clean['short_description'].astype(str).str.strip()
-        
-        # Remove empty descriptions
-        df_clean = df_clean[df_clean['short_description'] != '']
-        df_clean = df_clean[df_clean['short_description'].str.lower() != 'nan']
-        df_clean = df_clean[df_clean['KEDB'] != '']
-        df_clean = df_clean[df_clean['KEDB'].str.lower() != 'nan']
-        
-        print(f"🔍 Processing {len(df_clean)} valid records")
-        
-        # Show sample data before processing
-        print(f"\n📋 Sample data being processed:")
-        print(df_clean.head(3).to_string(index=False))
+        if db_file:
+            kedb_sql.create_key_index(conn, table, kedb_col)
+            groups = iter_sql_kedb_groups(conn, table, kedb_col, desc_col)
+        else:
+            # Read only the two needed columns, normalized once
+            print("📊 Reading KEDB_inc.xlsx...")
+            df = read_kedb_excel(input_file, id_columns=[kedb_col], text_columns=[desc_col])
+            print(f"📄 Loaded {len(df)} records")
+            
+            df_clean = clean_kedb_frame(df, kedb_col, desc_col)
+            
+            print(f"🔍 Processing {len(df_clean)} valid records")
+            
+            # Show sample data before processing
+            print(f"\n📋 Sample data being processed:")
+            print(df_clean.head(3).to_string(index=False))
+            
+            groups = (
+                (kedb, group['short_description'].tolist())
+                for kedb, group in df_clean.groupby('KEDB', observed=True)
+            )
         
         # Group by KEDB and combine unique descriptions
         print(f"\n🔗 Combining unique descriptions by KEDB...")
         
         result_data = []
         
-        for kedb, group in df_clean.groupby('KEDB'):
-            descriptions = group['short_description'].tolist()
-            
-            # Remove duplicates (case-insensitive) while preserving order
-            unique_descriptions = []
-            seen = set()
-            
-            for desc in descriptions:
-                desc_lower = desc.lower().strip()
-                if desc_lower not in seen and desc_lower:
-                    unique_descriptions.append(desc.strip())
-                    seen.add(desc_lower)
-            
-            combined = ' - '.join(unique_descriptions)
-            
+        for kedb, descriptions in groups:
             result_data.append({
                 'KEDB': kedb,
-                'combined_short_description': combined
+                'combined_short_description': combine_unique_descriptions(descriptions, near_duplicates)
             })
         
         # Create result DataFrame
@@ -126,6 +277,115 @@ def simple_kedb_duplicate_removal(input_file, output_file):
             pass
         
         return None
+    finally:
+        if conn is not None:
+            conn.close()
+
+def parse_kedb_file_partial(file_index, input_file):
+    """
+    Parse one export into a mergeable partial state
+
+    The state maps KEDB -> {lower-cased description: (first-seen position, description)},
+    where the position is (file_index, row number), so partial states from any
+    number of files can be merged in any order with merge_partial_states.
+
+    Returns:
+    dict: The partial state (empty if the file has no KEDB/description columns)
+    """
+    kedb_col, desc_col = find_kedb_columns(read_excel_columns(input_file))
+    if kedb_col is None or desc_col is None:
+        print(f"⚠️ Skipping {input_file}: KEDB/short_description columns not found")
+        return {}
+    
+    df = read_kedb_excel(input_file, id_columns=[kedb_col], text_columns=[desc_col])
+    df_clean = clean_kedb_frame(df, kedb_col, desc_col)
+    
+    state = {}
+    for row_number, (kedb, desc) in enumerate(zip(df_clean['KEDB'], df_clean['short_description'])):
+        descriptions = state.setdefault(kedb, {})
+        desc_lower = desc.lower()
+        if desc_lower not in descriptions:
+            descriptions[desc_lower] = ((file_index, row_number), desc)
+    
+    return state
+
+def merge_partial_states(left, right):
+    """
+    Merge two partial states, keeping each description's earliest position
+
+    The merge is associative and commutative, so partial results can be
+    combined as worker processes finish.
+    """
+    if len(left) < len(right):
+        left, right = right, left
+    
+    for kedb, descriptions in right.items():
+        merged = left.setdefault(kedb, {})
+        for desc_lower, entry in descriptions.items():
+            current = merged.get(desc_lower)
+            if current is None or entry[0] < current[0]:
+                merged[desc_lower] = entry
+    
+    return left
+
+def combine_kedb_files(input_pattern, output_file, near_duplicates=False, max_workers=None):
+    """
+    Combine many KEDB_inc.xlsx-style exports (a directory or glob pattern)
+
+    Each file is parsed in a separate process into a partial state; the states
+    are merged as they complete, so wall time scales with cores rather than with
+    the number of files. The output matches simple_kedb_duplicate_removal run on
+    the files concatenated in sorted file-name order.
+    """
+    
+    try:
+        if os.path.isdir(input_pattern):
+            input_files = sorted(
+                os.path.join(input_pattern, file) for file in os.listdir(input_pattern)
+                if file.endswith(('.xlsx', '.xls')) and not file.startswith('~$')
+            )
+        else:
+            input_files = sorted(glob.glob(input_pattern))
+        
+        if not input_files:
+            print(f"❌ No Excel files found for '{input_pattern}'")
+            return None
+        
+        print(f"📊 Parsing {len(input_files)} files in parallel...")
+        
+        state = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(parse_kedb_file_partial, file_index, input_file): input_file
+                for file_index, input_file in enumerate(input_files)
+            }
+            for future in as_completed(futures):
+                state = merge_partial_states(state, future.result())
+                print(f"   ✅ {futures[future]}")
+        
+        print(f"\n🔗 Combining unique descriptions by KEDB...")
+        
+        result_data = []
+        for kedb in sorted(state):
+            descriptions = [desc for _, desc in sorted(state[kedb].values())]
+            result_data.append({
+                'KEDB': kedb,
+                'combined_short_description': combine_unique_descriptions(descriptions, near_duplicates)
+            })
+        
+        result_df = pd.DataFrame(result_data, columns=['KEDB', 'combined_short_description'])
+        result_df.to_excel(output_file, sheet_name='Combined_KEDB_Data', index=False)
+        
+        print(f"\n✅ Processing complete!")
+        print(f"📊 Results: {len(result_df)} unique KEDB numbers from {len(input_files)} files")
+        print(f"💾 Output saved to: {output_file}")
+        
+        return result_df
+        
+    except Exception as e:
+        print(f"❌ Error at processing step: {str(e)}")
+        print(f"❌ Error type: {type(e).__name__}")
+        return None
 
 def check_excel_file_structure(input_file):
     """
@@ -172,12 +432,20 @@ def check_excel_file_structure(input_file):
 
 # Main execution
 if __name__ == "__main__":
-    input_file = "KEDB_inc.xlsx"
+    input_file = sys.argv[1] if len(sys.argv) > 1 else "KEDB_inc.xlsx"
     output_file = "KEDB_combined_simple.xlsx"
+    database_file = None  # e.g. "kedb_analysis.db" to group out-of-core in SQLite
     
     print("🚀 Fixed Simple KEDB Duplicate Removal & Combination")
     print("=" * 60)
     
+    # Directory or glob pattern: parse the monthly/regional exports in parallel
+    if os.path.isdir(input_file) or any(ch in input_file for ch in '*?['):
+        result = combine_kedb_files(input_file, output_file)
+        if result is not None:
+            print(f"\n🎉 SUCCESS! Check {output_file}")
+        exit(0 if result is not None else 1)
+    
     if not os.path.exists(input_file):
         print(f"❌ {input_file} not found!")
         print("\n📁 Excel files in current directory:")
@@ -194,7 +462,8 @@ if __name__ == "__main__":
         proceed = input("❓ Proceed with processing? (y/n): ").lower().strip()
         
         if proceed in ['y', 'yes']:
-            result = simple_kedb_duplicate_removal(input_file, output_file)
+            near_duplicates = input("❓ Also collapse near-duplicate descriptions? (y/n): ").lower().strip() in ['y', 'yes']
+            result = simple_kedb_duplicate_removal(input_file, output_file, near_duplicates, database_file)
             
             if result is not None:
                 print(f"\n🎉 SUCCESS! Check {output_file}")
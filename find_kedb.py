@@ -1,34 +1,79 @@
-import pandas as pd
+import kedb_sql
+from kedb_lookup import lookup_kedb
 
-def find_kedb_data(excel_file, kedb_number):
+def _text(value):
+    """Text cell as read_kedb_excel returns it: a stripped string, or None"""
+    return None if value is None else str(value).strip()
+
+def find_kedb_data(excel_file, kedb_number, db_file=None):
     """
     Find a specific KEDB number in ServicenowID column and return corresponding data
     
+    Rows whose ServicenowID equals the number (ignoring case and surrounding
+    whitespace) are preferred; only if there are none are IDs containing the
+    number matched. The first match in workbook order is returned.
+    
     Parameters:
     excel_file (str): Path to the Excel file
     kedb_number (str): The KEDB number to search for
+    db_file (str): Optional embedded database file; the workbook is loaded into it
+                   once and searched with SQL instead of in pandas memory
     
     Returns:
     dict: Dictionary containing the found data or None if not found
     """
     try:
-        # Read the Excel file
-        df = pd.read_excel(excel_file)
-        
-        # Check if required columns exist
         required_columns = ['short_description', 'Description', 'ServicenowID']
-        missing_columns = [col for col in required_columns if col not in df.columns]
         
-        if missing_columns:
-            print(f"Error: Missing columns in Excel file: {missing_columns}")
-            return None
-        
-        # Search for the KEDB number in ServicenowID column
-        # Using case-insensitive search and converting to string for comparison
-        mask = df['ServicenowID'].astype(str).str.contains(str(kedb_number), case=False, na=False)
-        matching_rows = df[mask]
+        if db_file:
+            conn = kedb_sql.connect(db_file)
+            try:
+                table, columns = kedb_sql.load_excel_table(conn, excel_file, key_columns=['ServicenowID'])
+                
+                missing_columns = [col for col in required_columns if col not in columns]
+                if missing_columns:
+                    print(f"Error: Missing columns in Excel file: {missing_columns}")
+                    return None
+                
+                # First two matches are enough to pick the first one and warn about duplicates
+                matching_rows = kedb_sql.find_rows_containing(
+                    conn, table, 'ServicenowID', kedb_number, required_columns, limit=2
+                )
+            finally:
+                conn.close()
+        else:
+            # Imported here so the fast lookup path never loads pandas
+            import pandas as pd
+
+            from kedb_io import read_kedb_excel
+            
+            # Read only the needed columns; IDs come back as stripped-string categoricals
+            df = read_kedb_excel(
+                excel_file,
+                id_columns=['ServicenowID'],
+                text_columns=['short_description', 'Description']
+            )
+            
+            # Check if required columns exist
+            missing_columns = [col for col in required_columns if col not in df.columns]
+            
+            if missing_columns:
+                print(f"Error: Missing columns in Excel file: {missing_columns}")
+                return None
+            
+            # Search for the KEDB number in ServicenowID column: an exact (case-insensitive)
+            # ID match wins, otherwise IDs containing the number
+            # Both searches run once per distinct ID, then map back to rows
+            ids = df['ServicenowID'].cat.categories
+            matching_ids = ids[ids.str.lower() == str(kedb_number).strip().lower()]
+            if len(matching_ids) == 0:
+                matching_ids = ids[ids.str.contains(str(kedb_number), case=False, regex=False, na=False)]
+            mask = df['ServicenowID'].isin(matching_ids)
+            # Empty cells come back as None, as in the SQL path and the lookup index
+            matching_rows = [{col: None if pd.isna(value) else value for col, value in row.items()}
+                             for row in df[mask].head(2).to_dict('records')]
         
-        if matching_rows.empty:
+        if not matching_rows:
             print(f"KEDB number '{kedb_number}' not found in ServicenowID column")
             return None
         
@@ -37,11 +82,11 @@ def find_kedb_data(excel_file, kedb_number):
             print(f"Warning: Multiple matches found for '{kedb_number}'. Returning the first match.")
         
         # Extract the data from the first matching row
-        row = matching_rows.iloc[0]
+        row = matching_rows[0]
         result = {
-            'ServicenowID': row['ServicenowID'],
-            'short_description': row['short_description'],
-            'Description': row['Description']
+            'ServicenowID': str(row['ServicenowID']).strip(),
+            'short_description': _text(row['short_description']),
+            'Description': _text(row['Description'])
         }
         
         return result
@@ -60,8 +105,8 @@ def main():
     # Get KEDB number from user input
     kedb_number = input("Enter the KEDB number to search for: ")
     
-    # Search for the KEDB data
-    result = find_kedb_data(excel_file, kedb_number)
+    # Search for the KEDB data (compact index, falling back to the Excel file)
+    result = lookup_kedb(kedb_number, excel_file)
     
     if result:
         print("\n" + "="*50)
@@ -75,18 +120,19 @@ def main():
         print("No data found or error occurred.")
 
 # Alternative function for direct usage without user input
-def get_kedb_info(kedb_number):
+def get_kedb_info(kedb_number, db_file=None):
     """
     Direct function to get KEDB info without user interaction
     
     Parameters:
     kedb_number (str): The KEDB number to search for
+    db_file (str): Optional embedded database file for out-of-core lookups
     
     Returns:
     dict: Dictionary containing the found data
     """
     excel_file = "kedb_data.xlsx"
-    return find_kedb_data(excel_file, kedb_number)
+    return find_kedb_data(excel_file, kedb_number, db_file)
 
 if __name__ == "__main__":
     main()
@@ -96,14 +142,3 @@ if __name__ == "__main__":
 # if result:
 #     print(f"Short Description: {result['short_description']}")
 #     print(f"Description: {result['Description']}")
-
-
-
-
-# Search for a specific KEDB number
-result = get_kedb_info("KB0012345")  # Replace with your actual KEDB number
-
-if result:
-    print(f"ServicenowID: {result['ServicenowID']}")
-    print(f"Short Description: {result['short_description']}")
-    print(f"Description: {result['Description']}")
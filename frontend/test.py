@@ -1,60 +1,135 @@
-function jsonToReadable(obj, indent = 0) {
-  let output = "";
-  const spaces = " ".repeat(indent);
-
-  // Function to find step number field dynamically
-  function findStepNumberField(item) {
-    if (typeof item !== "object" || item === null) return null;
-    
-    // Common variations of step number field names
-    const stepFieldVariations = [
-      'step_number', 'step number', 'stepnumber', 'step_no', 'step no', 
-      'step', 'step_id', 'stepid', 'number', 'no', 'sequence', 'order'
-    ];
-    
-    for (let key in item) {
-      if (stepFieldVariations.includes(key.toLowerCase().replace(/[_\s]/g, '').replace(/[_\s]/g, ' ').trim().toLowerCase())) {
-        return key;
-      }
-    }
-    return null;
+// Common variations of step number field names
+const stepFieldVariations = new Set([
+  'step_number', 'step number', 'stepnumber', 'step_no', 'step no',
+  'step', 'step_id', 'stepid', 'number', 'no', 'sequence', 'order'
+]);
+
+// Caches shared across calls: normalized key -> is step field, key -> display key,
+// object shape -> step field, indent -> spaces
+const stepKeyCache = new Map();
+const formattedKeyCache = new Map();
+const stepFieldByShape = new Map();
+const spacesCache = [];
+
+function isStepKey(key) {
+  let isStep = stepKeyCache.get(key);
+  if (isStep === undefined) {
+    isStep = stepFieldVariations.has(key.toLowerCase().replace(/[_\s]/g, '').trim());
+    stepKeyCache.set(key, isStep);
   }
+  return isStep;
+}
+
+function formatKey(key) {
+  let formatted = formattedKeyCache.get(key);
+  if (formatted === undefined) {
+    formatted = key.replace(/_/g, " "); // Optional: Replace underscores with spaces
+    formattedKeyCache.set(key, formatted);
+  }
+  return formatted;
+}
+
+function getSpaces(indent) {
+  return spacesCache[indent] || (spacesCache[indent] = " ".repeat(indent));
+}
+
+// Function to find step number field dynamically, cached per object shape
+function findStepNumberField(item) {
+  if (typeof item !== "object" || item === null) return null;
+
+  const keys = [];
+  for (let key in item) keys.push(key);
+  const shape = keys.join("\u0000");
+
+  let stepField = stepFieldByShape.get(shape);
+  if (stepField === undefined) {
+    stepField = keys.find(isStepKey) || null;
+    if (stepFieldByShape.size >= 10000) stepFieldByShape.clear(); // Bound memory on irregular payloads
+    stepFieldByShape.set(shape, stepField);
+  }
+  return stepField;
+}
+
+// Append the readable form of obj to out, skipping skipKey (the step number field)
+function appendReadable(out, obj, indent, skipKey) {
+  const spaces = getSpaces(indent);
 
   // Iterate over all keys in the object
   for (let key in obj) {
-    if (!obj.hasOwnProperty(key)) continue;
+    if (!obj.hasOwnProperty(key) || key === skipKey) continue;
 
     const value = obj[key];
-    const formattedKey = key.replace(/_/g, " "); // Optional: Replace underscores with spaces
+    const formattedKey = formatKey(key);
 
     if (Array.isArray(value)) {
       // If it's an array, print each element recursively
-      output += `${spaces}${formattedKey}:\n\n`;
-      value.forEach((item, index) => {
+      out.push(spaces, formattedKey, ":\n\n");
+      for (let index = 0; index < value.length; index++) {
+        const item = value[index];
         // Dynamically find step number field
         const stepField = findStepNumberField(item);
-        
+
         if (stepField && item[stepField]) {
-          output += `${spaces}  Step ${item[stepField]}:\n`;
-          // Create a copy of the item without the step number field to avoid duplication
-          const itemCopy = { ...item };
-          delete itemCopy[stepField];
-          output += jsonToReadable(itemCopy, indent + 4);
+          out.push(spaces, "  Step ", item[stepField], ":\n");
+          appendReadable(out, item, indent + 4, stepField);
         } else {
-          output += `${spaces}  ${index + 1}:\n`;
-          output += jsonToReadable(item, indent + 4);
+          out.push(spaces, "  ", index + 1, ":\n");
+          appendReadable(out, item, indent + 4, null);
         }
-        output += "\n"; // Add extra line break between steps
-      });
+        out.push("\n"); // Add extra line break between steps
+      }
     } else if (typeof value === "object" && value !== null) {
       // If it's a nested object, recurse into it
-      output += `${spaces}${formattedKey}:\n\n`;
-      output += jsonToReadable(value, indent + 2);
+      out.push(spaces, formattedKey, ":\n\n");
+      appendReadable(out, value, indent + 2, null);
     } else {
       // Normal key-value
-      output += `${spaces}${formattedKey}: ${value}\n\n`;
+      out.push(spaces, formattedKey, ": ", String(value), "\n\n");
     }
   }
+}
+
+function jsonToReadable(obj, indent = 0) {
+  const out = [];
+  appendReadable(out, obj, indent, null);
+  return out.join("");
+}
+
+// Benchmark on a large nested payload: node frontend/test.py [steps] [repeats]
+function benchmarkJsonToReadable(stepCount = 500, repeats = 20) {
+  const makeStep = (i) => ({
+    Step_Number: i + 1,
+    Action: `Check job dependencies for job ${i}`,
+    Commands: Array.from({ length: 5 }, (_, c) => ({
+      step_no: c + 1,
+      command: `job_depends -J JOB_${i}_${c} -d`,
+      details: { host: `crvrt${i % 10}000b`, timeout_seconds: 30 * c },
+    })),
+    Verification: "Review the output for any failed dependencies.",
+    Expected_Result: "Output showing the dependencies of the job.",
+  });
+
+  const payload = {
+    Error: "CTR PC3 CTR.WEEKLY_UNDETECT_REPORT_CLEANUP_V2.B - JOBTERMINATED",
+    Rootcause: "The job terminated unexpectedly.",
+    Resolution: {
+      Description: "Steps to resolve the termination of the Autosys job.",
+      Resolution_Steps: Array.from({ length: stepCount }, (_, i) => makeStep(i)),
+    },
+  };
+
+  let length = 0;
+  const start = process.hrtime.bigint();
+  for (let r = 0; r < repeats; r++) {
+    length = jsonToReadable(payload).length;
+  }
+  const elapsedMs = Number(process.hrtime.bigint() - start) / 1e6;
+
+  console.log(`jsonToReadable: ${stepCount} steps, ${length} chars, ${(elapsedMs / repeats).toFixed(2)} ms/render`);
+  return elapsedMs / repeats;
+}
 
-  return output;
+if (typeof require !== "undefined" && typeof module !== "undefined" && require.main === module) {
+  const [steps, repeats] = process.argv.slice(2).map(Number);
+  benchmarkJsonToReadable(steps || undefined, repeats || undefined);
 }
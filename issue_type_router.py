@@ -0,0 +1,226 @@
+import os
+import pickle
+import re
+import sys
+import zlib
+
+import numpy as np
+
+ROUTER_VERSION = 1
+FEATURE_BITS = 16
+FEATURE_DIM = 1 << FEATURE_BITS
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+# Stands for the issue type in shared instructions; filled in when a prompt is routed
+ISSUE_TYPE_PLACEHOLDER = "[ISSUE TYPE]"
+
+
+def router_path_for(output_file):
+    """Router file saved alongside the prompts workbook"""
+    return os.path.splitext(output_file)[0] + '_router.pkl'
+
+
+def description_features(description):
+    """
+    Hashed word unigram/bigram features of a description, L2-normalized
+
+    Digits are masked so job numbers and timestamps do not split issue types.
+
+    Returns:
+    tuple: (indices, weights) NumPy arrays
+    """
+    tokens = TOKEN_RE.findall(re.sub(r'\d+', '0', str(description).lower()))
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    features = {}
+    for gram in grams:
+        h = zlib.crc32(gram.encode('utf-8'))
+        idx = h & (FEATURE_DIM - 1)
+        sign = 1.0 if (h >> 31) & 1 else -1.0
+        features[idx] = features.get(idx, 0.0) + sign
+
+    if not features:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    indices = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+    weights = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+    weights = np.sign(weights) * np.log1p(np.abs(weights))
+    norm = np.linalg.norm(weights)
+    if norm > 0:
+        weights /= norm
+    return indices, weights
+
+
+def new_router_state():
+    """Empty per-issue-type centroid accumulator, filled while the corpus is scanned"""
+    return {'sums': {}, 'counts': {}}
+
+
+def add_router_sample(state, issue_type, description):
+    """Add one historical short_description to the centroid of its issue_type"""
+    indices, weights = description_features(description)
+    if indices.size == 0:
+        return
+
+    centroid = state['sums'].get(issue_type)
+    if centroid is None:
+        centroid = np.zeros(FEATURE_DIM, dtype=np.float32)
+        state['sums'][issue_type] = centroid
+        state['counts'][issue_type] = 0
+
+    centroid[indices] += weights
+    state['counts'][issue_type] += 1
+
+
+def build_issue_type_router(state, prompts, shared_instructions=None):
+    """
+    Build a nearest-centroid router from the accumulated descriptions
+
+    Parameters:
+    state (dict): Accumulator from new_router_state / add_router_sample
+    prompts (dict): issue_type -> enhanced_ai_prompt
+    shared_instructions (str): Instructions appended to every prompt (compact prompts),
+        with ISSUE_TYPE_PLACEHOLDER standing for the routed issue type
+
+    Returns:
+    dict: The router, or None if no issue type had both descriptions and a prompt
+    """
+    issue_types = [issue_type for issue_type in state['sums'] if issue_type in prompts]
+    if not issue_types:
+        return None
+
+    centroids = np.vstack([state['sums'][issue_type] for issue_type in issue_types])
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    centroids /= norms
+
+    return {
+        'version': ROUTER_VERSION,
+        'feature_bits': FEATURE_BITS,
+        'issue_types': issue_types,
+        'prompts': [prompts[issue_type] for issue_type in issue_types],
+        'sample_counts': [state['counts'][issue_type] for issue_type in issue_types],
+        'shared_instructions': shared_instructions,
+        # Feature-major layout so a query gathers a few contiguous rows
+        'centroids_by_feature': np.ascontiguousarray(centroids.T),
+    }
+
+
+def save_issue_type_router(router, router_file):
+    """Persist the router next to the prompts workbook"""
+    tmp_file = router_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(router, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, router_file)
+
+
+def load_issue_type_router(router_file):
+    """Load a router saved by save_issue_type_router, or None if missing/incompatible"""
+    try:
+        with open(router_file, 'rb') as f:
+            router = pickle.load(f)
+    except FileNotFoundError:
+        print(f"Error: Router file '{router_file}' not found")
+        return None
+
+    if router.get('version') != ROUTER_VERSION or router.get('feature_bits') != FEATURE_BITS:
+        print(f"Error: Router file '{router_file}' was built by an incompatible version")
+        return None
+    return router
+
+
+def _router_prompt(router, i):
+    """Prompt for the i-th issue type, with the shared instructions for that issue type if any"""
+    prompt = router['prompts'][i]
+    if router.get('shared_instructions'):
+        instructions = router['shared_instructions'].replace(ISSUE_TYPE_PLACEHOLDER, str(router['issue_types'][i]))
+        prompt = f"{prompt}\n\n{instructions}"
+    return prompt
+
+
+def route_description(router, description):
+    """
+    Pick the issue_type and prompt for a new incident description
+
+    Returns:
+    dict: issue_type, prompt and cosine score, or None if no feature matched
+    """
+    indices, weights = description_features(description)
+    if indices.size == 0:
+        return None
+
+    scores = weights @ router['centroids_by_feature'][indices]
+    best = int(np.argmax(scores))
+    if scores[best] <= 0:
+        return None
+
+    return {
+        'issue_type': router['issue_types'][best],
+        'prompt': _router_prompt(router, best),
+        'score': float(scores[best])
+    }
+
+
+def route_descriptions(router, descriptions):
+    """
+    Batch mode of route_description for incident backlogs
+
+    Descriptions are hashed and scored a chunk at a time with one gather and
+    segmented sum per chunk.
+
+    Returns:
+    list: One route_description-style result (or None) per description
+    """
+    centroids_by_feature = router['centroids_by_feature']
+    results = []
+    chunk_size = 1024
+
+    for start in range(0, len(descriptions), chunk_size):
+        chunk = descriptions[start:start + chunk_size]
+        features = [description_features(desc) for desc in chunk]
+
+        scores = np.zeros((len(chunk), centroids_by_feature.shape[1]), dtype=np.float32)
+        non_empty = [i for i, (idx, _) in enumerate(features) if idx.size]
+        if non_empty:
+            cols = np.concatenate([features[i][0] for i in non_empty])
+            vals = np.concatenate([features[i][1] for i in non_empty])
+            offsets = np.cumsum([0] + [features[i][0].size for i in non_empty[:-1]])
+            # Sparse (chunk x features) @ (features x issue_types) as one gather + segmented sum
+            scores[non_empty] = np.add.reduceat(vals[:, None] * centroids_by_feature[cols], offsets, axis=0)
+
+        best = scores.argmax(axis=1)
+        for i, b in enumerate(best):
+            score = float(scores[i, b])
+            if features[i][0].size == 0 or score <= 0:
+                results.append(None)
+            else:
+                results.append({
+                    'issue_type': router['issue_types'][b],
+                    'prompt': _router_prompt(router, b),
+                    'score': score
+                })
+
+    return results
+
+
+# Main execution
+if __name__ == "__main__":
+    router_file = router_path_for("enhanced_format_specific_prompts.xlsx")
+    router = load_issue_type_router(router_file)
+    if router is None:
+        exit(1)
+
+    if len(sys.argv) > 1:
+        # Batch mode: one incident description per line
+        with open(sys.argv[1], encoding='utf-8') as f:
+            backlog = [line.strip() for line in f if line.strip()]
+        for desc, match in zip(backlog, route_descriptions(router, backlog)):
+            print(f"{match['issue_type'] if match else 'UNKNOWN'}\t{desc}")
+    else:
+        description = input("Enter the incident description: ")
+        match = route_description(router, description)
+        if match:
+            print(f"Issue type: {match['issue_type']} (score {match['score']:.3f})")
+            print("=" * 50)
+            print(match['prompt'])
+        else:
+            print("No matching issue type found.")
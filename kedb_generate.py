@@ -0,0 +1,248 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from issue_type_router import load_issue_type_router, route_description, router_path_for
+
+CACHE_MAX_ENTRIES = 10000
+CACHE_TTL_SECONDS = 24 * 3600
+PREWARM_TOP_N = 100
+
+
+def normalize_description(description):
+    """
+    Cache key form of an incident description
+
+    Lower-cased with whitespace collapsed. Digits are kept: drafts embed the
+    description (job names, commands), so descriptions that differ only by a
+    job number must not share a draft.
+    """
+    return re.sub(r'\s+', ' ', str(description).lower()).strip()
+
+
+def prompt_version(prompt):
+    """Short content hash of the issue_type prompt; regenerating prompts invalidates old drafts"""
+    return hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:12] if prompt else 'none'
+
+
+def stub_generator(description, issue_type, prompt, include_steps=True, output_format='markdown'):
+    """Local stand-in for the LLM call, returning the same draft as the sample server (markdown only)"""
+    draft = f"""**KEDB Draft**
+
+**Error:** {description}
+
+**Issue Type:** {issue_type or 'Unknown'}
+
+**Rootcause:** The job {description} terminated unexpectedly. This specific cause requires further investigation but common causes include resource contention, downstream job failures, or issues within the job script itself."""
+    if not include_steps:
+        return draft
+    return draft + f"""
+
+**Resolution Steps**
+
+Step_Number: 1
+Action: Check Job Dependencies
+Command: job_depends | {description} -d
+Verification: Review the output for any failed dependencies.
+Expected_Result: Output showing the dependencies of the job. If any dependent job failed, address that failure first."""
+
+
+class GenerationCache:
+    """
+    TTL/LRU cache of generated drafts with coalescing of concurrent identical requests
+
+    Keys are (normalized description, includeSteps, format, issue_type, prompt
+    version). While a draft is being generated, other requests for the same key
+    wait on the same Future instead of calling the generator again.
+    """
+
+    def __init__(self, generator=stub_generator, router=None,
+                 max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.generator = generator
+        self.router = router
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (expires_at, content)
+        self.in_flight = {}           # key -> Future
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'generated': 0}
+
+    def _route(self, description):
+        if self.router is None:
+            return None, None
+        match = route_description(self.router, description)
+        if match is None:
+            return None, None
+        return match['issue_type'], match['prompt']
+
+    def get(self, description, include_steps=True, output_format='markdown'):
+        """Return the cached draft for description and request options, generating it at most once"""
+        issue_type, prompt = self._route(description)
+        key = (normalize_description(description), include_steps, output_format,
+               issue_type, prompt_version(prompt))
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self.entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[1]
+                del self.entries[key]
+
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                owner = False
+            else:
+                future = Future()
+                self.in_flight[key] = future
+                self.stats['misses'] += 1
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            content = self.generator(description, issue_type, prompt, include_steps, output_format)
+        except Exception as e:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self.stats['generated'] += 1
+            self.entries[key] = (self.clock() + self.ttl_seconds, content)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            del self.in_flight[key]
+        future.set_result(content)
+        return content
+
+
+def prewarm_cache(cache, incident_file, top_n=PREWARM_TOP_N):
+    """
+    Generate drafts for the most frequent incident descriptions in KEDB_inc.xlsx
+
+    Descriptions are counted by their normalized form; the first original
+    wording of each of the top_n forms is generated.
+
+    Returns:
+    int: Number of descriptions warmed
+    """
+    from kedb_io import read_excel_columns, read_kedb_excel
+
+    try:
+        columns = read_excel_columns(incident_file)
+    except FileNotFoundError:
+        print(f"❌ {incident_file} not found, skipping pre-warm")
+        return 0
+
+    desc_col = next((col for col in columns
+                     if 'short' in str(col).lower() and 'description' in str(col).lower()), None)
+    if desc_col is None:
+        print(f"❌ No short_description column in {incident_file}, skipping pre-warm")
+        return 0
+
+    # Only the description column is loaded, already stripped
+    descriptions = read_kedb_excel(incident_file, text_columns=[desc_col])[desc_col].dropna()
+    descriptions = descriptions[descriptions != '']
+    normalized = descriptions.map(normalize_description)
+    top = normalized.value_counts().head(top_n).index
+
+    first_wording = descriptions.groupby(normalized).first()
+    for form in top:
+        cache.get(first_wording[form])
+
+    print(f"🔥 Pre-warmed {len(top)} drafts from {incident_file}")
+    return len(top)
+
+
+def make_handler(cache):
+    """Create a request handler serving POST /api/generate-kedb through the cache"""
+
+    class GenerateKedbHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.end_headers()
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/api/generate-kedb':
+                self._send_json(404, {'error': 'Not found'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(request, dict):
+                    raise ValueError('request body must be a JSON object')
+                description = str(request.get('description') or '')
+                include_steps = request.get('includeSteps', True)
+                if not isinstance(include_steps, bool):
+                    raise ValueError('includeSteps must be a JSON boolean')
+                output_format = request.get('format') or 'markdown'
+                if not isinstance(output_format, str):
+                    raise ValueError('format must be a string')
+            except (ValueError, TypeError) as e:
+                self._send_json(400, {'error': f'Invalid request: {str(e)}'})
+                return
+
+            print(f"Generating KEDB for: {description}")
+            try:
+                content = cache.get(description, include_steps, output_format)
+            except Exception as e:
+                self._send_json(502, {'error': f'Generation failed: {str(e)}'})
+                return
+            self._send_json(200, {'content': content})
+
+    return GenerateKedbHandler
+
+
+def serve(cache, host='localhost', port=3003):
+    """Serve POST /api/generate-kedb on a local HTTP endpoint"""
+    server = ThreadingHTTPServer((host, port), make_handler(cache))
+    print(f"KEDB generation server running on http://{host}:{port}")
+    print('Available endpoints:')
+    print('  POST /api/generate-kedb')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# Main execution
+if __name__ == "__main__":
+    prompts_file = "enhanced_format_specific_prompts.xlsx"
+    incident_file = "KEDB_inc.xlsx"
+
+    print("🚀 Starting cached KEDB draft generation...")
+    router = load_issue_type_router(router_path_for(prompts_file))
+    if router is None:
+        print("⚠️ No issue-type router; drafts are cached by description only")
+
+    # Replace stub_generator with the real LLM call in deployment
+    generation_cache = GenerationCache(stub_generator, router)
+    prewarm_cache(generation_cache, incident_file)
+    serve(generation_cache)
@@ -0,0 +1,107 @@
+from array import array
+
+import numpy as np
+import pandas as pd
+from kedb_sql import cell_value, header_names, iter_sheet_rows, trim_header
+
+# Long text goes to Arrow-backed strings when pyarrow is installed, else stays object
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = 'string[pyarrow]'
+except ImportError:
+    TEXT_DTYPE = None
+
+
+def read_excel_columns(excel_file):
+    """Column names of a workbook's first sheet, without loading its rows"""
+    rows = iter_sheet_rows(excel_file, max_row=1)
+    try:
+        header = next(rows, ())
+    finally:
+        rows.close()
+    return header_names(trim_header(header))
+
+
+def _id_categorical(codes, ids):
+    """Categorical with sorted categories from first-seen codes (-1 for null)"""
+    first_seen = list(ids)
+    order = sorted(range(len(first_seen)), key=first_seen.__getitem__)
+    # remap[first-seen code] = sorted code; the extra last slot maps -1 to -1
+    remap = np.full(len(first_seen) + 1, -1, dtype=np.int32)
+    remap[np.asarray(order, dtype=np.intp)] = np.arange(len(first_seen), dtype=np.int32)
+    codes = remap[np.frombuffer(codes, dtype=np.intc)] if len(codes) else np.empty(0, dtype=np.int32)
+    return pd.Categorical.from_codes(codes, [first_seen[i] for i in order])
+
+
+def read_kedb_excel(excel_file, id_columns=(), category_columns=(), text_columns=(), other_columns=False):
+    """
+    Shared loader for the KEDB/incident workbooks
+
+    Rows are streamed from the first sheet (iter_sheet_rows) and only the
+    requested columns are kept, normalized while reading:
+    ID columns become stripped-string categoricals (str() and strip() run once
+    per distinct ID), category columns (e.g. issue_type) become categoricals
+    as-is, and text columns become stripped strings. Cells are read as
+    pandas.read_excel would read them. Requested columns missing from the
+    workbook are left out so callers can report them.
+
+    Parameters:
+    excel_file (str): Path to the Excel file
+    id_columns (iterable): ID columns such as KEDB or ServicenowID
+    category_columns (iterable): Low-cardinality columns such as issue_type
+    text_columns (iterable): Free-text columns such as short_description
+    other_columns (bool): Also keep every other column, unchanged
+
+    Returns:
+    DataFrame: The loaded columns, in workbook order
+    """
+    id_columns = set(id_columns)
+    category_columns = set(category_columns)
+    text_columns = set(text_columns)
+    wanted = id_columns | category_columns | text_columns
+
+    rows = iter_sheet_rows(excel_file)
+    try:
+        columns = header_names(trim_header(next(rows, ())))
+        positions = [(i, col) for i, col in enumerate(columns) if other_columns or col in wanted]
+
+        # ID columns: int32 codes per row, plus distinct raw value -> code and stripped ID -> code
+        id_codes = {col: array('i') for _, col in positions if col in id_columns}
+        id_lookup = {col: {} for col in id_codes}
+        id_values = {col: {} for col in id_codes}
+        values = {col: [] for _, col in positions if col not in id_codes}
+
+        for row in rows:
+            for i, col in positions:
+                value = cell_value(row[i]) if i < len(row) else None
+                if col in id_codes:
+                    if value is None:
+                        code = -1
+                    else:
+                        key = value if type(value) is str else (type(value), value)
+                        code = id_lookup[col].get(key)
+                        if code is None:
+                            ids = id_values[col]
+                            code = ids.setdefault(str(value).strip(), len(ids))
+                            id_lookup[col][key] = code
+                    id_codes[col].append(code)
+                elif col in text_columns:
+                    values[col].append(None if value is None else str(value).strip())
+                else:
+                    values[col].append(value)
+    finally:
+        rows.close()
+
+    data = {}
+    for _, col in positions:
+        if col in id_codes:
+            data[col] = _id_categorical(id_codes.pop(col), id_values.pop(col))
+        elif col in category_columns:
+            data[col] = pd.Categorical(values.pop(col))
+        elif col in text_columns:
+            text = values.pop(col)
+            data[col] = pd.array(text, dtype=TEXT_DTYPE) if TEXT_DTYPE else np.array(text, dtype=object)
+        else:
+            data[col] = pd.Series(values.pop(col))
+
+    return pd.DataFrame(data, columns=[col for _, col in positions])
@@ -0,0 +1,253 @@
+"""
+Fast single-KEDB lookup for shell aliases: python kedb_lookup.py KB0012345
+
+Answers from a compact index file next to the workbook instead of parsing the
+workbook with pandas. Nothing heavy is imported and no work is done at import
+time; the workbook is parsed only when the index is missing or older than it,
+to rebuild the index, and the lookup is then answered from the new index.
+
+Index layout (little-endian):
+    header          magic, source mtime, source size, entry count n
+    key_offsets     n + 1 uint64, into the keys blob
+    row_numbers     n uint64, workbook row of each key
+    record_offsets  n + 1 uint64, into the records blob
+    keys blob       lower-cased ServicenowIDs in sorted order, each followed by a newline
+    records blob    one JSON record per key
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_right
+
+EXCEL_FILE = "kedb_data.xlsx"
+INDEX_MAGIC = b'KEDBIDX3'
+HEADER = struct.Struct('<8sdqQ')
+UINT64 = struct.Struct('<Q')
+
+
+def index_path_for(excel_file):
+    """Index file saved next to the workbook"""
+    return os.path.splitext(excel_file)[0] + '.kidx'
+
+
+def build_lookup_index(excel_file, index_file=None):
+    """
+    Build the compact lookup index from the KEDB workbook (imports pandas through kedb_io)
+
+    Returns:
+    str: Path of the index file, or None if the workbook could not be read
+    """
+    import pandas as pd
+
+    from kedb_io import read_kedb_excel
+
+    index_file = index_file or index_path_for(excel_file)
+    required_columns = ['ServicenowID', 'short_description', 'Description']
+    try:
+        # Loaded like find_kedb_data: stripped-string IDs and stripped text
+        df = read_kedb_excel(
+            excel_file,
+            id_columns=['ServicenowID'],
+            text_columns=['short_description', 'Description']
+        )
+    except FileNotFoundError:
+        print(f"Error: File '{excel_file}' not found")
+        return None
+    except Exception as e:
+        print(f"Error reading Excel file: {str(e)}")
+        return None
+
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        print(f"Error: Missing columns in Excel file: {missing_columns}")
+        return None
+
+    entries = []
+    for row_number, (servicenow_id, short_description, description) in enumerate(
+            df[required_columns].itertuples(index=False, name=None)):
+        if pd.isna(servicenow_id):
+            continue
+        key = servicenow_id.lower().encode('utf-8')
+        record = json.dumps({
+            'ServicenowID': servicenow_id,
+            'short_description': None if pd.isna(short_description) else short_description,
+            'Description': None if pd.isna(description) else description
+        }).encode('utf-8')
+        entries.append((key, row_number, record))
+    entries.sort()
+
+    key_offsets, record_offsets = [0], [0]
+    for key, _, record in entries:
+        key_offsets.append(key_offsets[-1] + len(key) + 1)
+        record_offsets.append(record_offsets[-1] + len(record))
+
+    stat = os.stat(excel_file)
+    tmp_file = index_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(INDEX_MAGIC, stat.st_mtime, stat.st_size, len(entries)))
+        f.write(struct.pack(f'<{len(key_offsets)}Q', *key_offsets))
+        f.write(struct.pack(f'<{len(entries)}Q', *(row for _, row, _ in entries)))
+        f.write(struct.pack(f'<{len(record_offsets)}Q', *record_offsets))
+        for key, _, _ in entries:
+            f.write(key + b'\n')
+        for _, _, record in entries:
+            f.write(record)
+    os.replace(tmp_file, index_file)
+
+    return index_file
+
+
+class LookupIndex:
+    """Read-only view of an index file through mmap"""
+
+    def __init__(self, index_file):
+        with open(index_file, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.source_mtime, self.source_size, self.count = HEADER.unpack_from(self.mm, 0)
+        if magic != INDEX_MAGIC:
+            self.mm.close()
+            raise ValueError(f"'{index_file}' is not a KEDB lookup index")
+
+        n = self.count
+        key_offsets_at = HEADER.size
+        self.row_numbers_at = key_offsets_at + 8 * (n + 1)
+        self.record_offsets_at = self.row_numbers_at + 8 * n
+        self.keys_at = self.record_offsets_at + 8 * (n + 1)
+
+        # Zero-copy uint64 view of the key offsets table (the file is little-endian)
+        self.view = memoryview(self.mm)
+        self.key_offsets = self.view[key_offsets_at:self.row_numbers_at].cast('Q')
+        if sys.byteorder != 'little':
+            self.key_offsets = [UINT64.unpack_from(self.mm, key_offsets_at + 8 * i)[0] for i in range(n + 1)]
+        self.records_at = self.keys_at + self.key_offsets[n]
+
+    def close(self):
+        if isinstance(self.key_offsets, memoryview):
+            self.key_offsets.release()
+        self.view.release()
+        self.mm.close()
+
+    def is_current(self, excel_file):
+        """True if the index was built from the workbook as it is now"""
+        try:
+            stat = os.stat(excel_file)
+        except FileNotFoundError:
+            # Workbook gone: the index is all we have
+            return True
+        return stat.st_mtime == self.source_mtime and stat.st_size == self.source_size
+
+    def key(self, i):
+        return self.mm[self.keys_at + self.key_offsets[i]:self.keys_at + self.key_offsets[i + 1] - 1]
+
+    def row_number(self, i):
+        return UINT64.unpack_from(self.mm, self.row_numbers_at + 8 * i)[0]
+
+    def record(self, i):
+        start = UINT64.unpack_from(self.mm, self.record_offsets_at + 8 * i)[0]
+        end = UINT64.unpack_from(self.mm, self.record_offsets_at + 8 * (i + 1))[0]
+        return json.loads(self.mm[self.records_at + start:self.records_at + end])
+
+    def exact_matches(self, key):
+        """Positions of all entries equal to key (binary search over the sorted keys)"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        matches = []
+        while lo < self.count and self.key(lo) == key:
+            matches.append(lo)
+            lo += 1
+        return matches
+
+    def substring_matches(self, text):
+        """Positions of all entries containing text (scans the mmap'd keys blob)"""
+        if not text or b'\n' in text:
+            return []
+        key_offsets = self.key_offsets
+        matches = []
+        pos = self.mm.find(text, self.keys_at, self.records_at)
+        while pos != -1:
+            i = bisect_right(key_offsets, pos - self.keys_at, 0, self.count + 1) - 1
+            matches.append(i)
+            # Continue after this key so each entry is reported once
+            pos = self.mm.find(text, self.keys_at + key_offsets[i + 1], self.records_at)
+        return matches
+
+
+def open_current_index(excel_file, index_file):
+    """Open the index if it exists and was built from the workbook as it is now, else None"""
+    if not os.path.exists(index_file):
+        return None
+    try:
+        index = LookupIndex(index_file)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Warning: Ignoring unreadable index '{index_file}': {str(e)}")
+        return None
+    if not index.is_current(excel_file):
+        index.close()
+        return None
+    return index
+
+
+def lookup_kedb(kedb_number, excel_file=EXCEL_FILE, index_file=None):
+    """
+    Look up one KEDB number, answering from the compact index when it is current
+
+    Same rule as find_kedb_data: an exact (case-insensitive, stripped) ServicenowID
+    match, found by binary search, wins; otherwise entries containing the number
+    are matched. The first match in workbook order is returned.
+
+    Returns:
+    dict: Dictionary containing the found data or None if not found
+    """
+    index_file = index_file or index_path_for(excel_file)
+
+    index = open_current_index(excel_file, index_file)
+    if index is None:
+        # Slow path: parse the workbook once to rebuild the index, then answer from it
+        if build_lookup_index(excel_file, index_file) is None:
+            return None
+        index = open_current_index(excel_file, index_file)
+        if index is None:
+            return None
+
+    try:
+        matches = (index.exact_matches(str(kedb_number).strip().lower().encode('utf-8'))
+                   or index.substring_matches(str(kedb_number).lower().encode('utf-8')))
+
+        if not matches:
+            print(f"KEDB number '{kedb_number}' not found in ServicenowID column")
+            return None
+
+        if len(matches) > 1:
+            print(f"Warning: Multiple matches found for '{kedb_number}'. Returning the first match.")
+
+        return index.record(min(matches, key=index.row_number))
+    finally:
+        index.close()
+
+
+def main():
+    kedb_number = sys.argv[1] if len(sys.argv) > 1 else input("Enter the KEDB number to search for: ")
+
+    result = lookup_kedb(kedb_number)
+
+    if result:
+        print("\n" + "="*50)
+        print("FOUND KEDB DATA:")
+        print("="*50)
+        print(f"ServicenowID: {result['ServicenowID']}")
+        print(f"Short Description: {result['short_description']}")
+        print(f"Description: {result['Description']}")
+        print("="*50)
+    else:
+        print("No data found or error occurred.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import os
+import re
+import sqlite3
+import zlib
+from datetime import date, datetime, time
+
+BATCH_SIZE = 5000
+KEY_COLUMN_PREFIX = '_key_'
+# Bumped when loaded values change, so tables from an older loader are reloaded
+LOADER_VERSION = 2
+# Workbook formats openpyxl can stream; anything else goes through pandas.read_excel
+OPENPYXL_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+
+# Cell strings pandas.read_excel reads as missing (its default na_values)
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+
+def connect(db_file):
+    """Open (or create) the local embedded database file"""
+    conn = sqlite3.connect(db_file)
+    conn.create_function('kedb_strip', 1, _strip_key, deterministic=True)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS _sources (
+            path TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL
+        )
+    """)
+    return conn
+
+
+def quote(name):
+    """Quote a column or table name for SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _strip_key(value):
+    """pandas' .astype(str).str.strip() for one non-null ID value"""
+    return None if value is None else str(value).strip()
+
+
+def key_column(column):
+    """Name of the stored stripped-string copy of an ID column"""
+    return KEY_COLUMN_PREFIX + column
+
+
+def key_expr(column, table=None):
+    """
+    Stripped-string form of an ID column, as pandas' .astype(str).str.strip()
+
+    The key is stored in its own column at load time with Python's str.strip(),
+    so Unicode whitespace such as the non-breaking spaces in Excel exports is
+    removed exactly as in the pandas path. Joins, groupbys and lookups use it.
+    """
+    name = key_column(column)
+    return f"{quote(table)}.{quote(name)}" if table else quote(name)
+
+
+def cell_value(value):
+    """A cell as pandas.read_excel reads it: integral floats become ints, NA strings become None"""
+    if isinstance(value, float):
+        if value != value:
+            return None
+        if value.is_integer():
+            return int(value)
+    elif isinstance(value, str) and value in NA_STRINGS:
+        return None
+    return value
+
+
+def trim_header(header):
+    """Drop trailing unnamed header cells (pandas does not create columns for them)"""
+    header = list(header)
+    while header and header[-1] is None:
+        header.pop()
+    return header
+
+
+def header_names(header):
+    """Column names as pandas.read_excel would label them"""
+    names = []
+    seen = {}
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def iter_sheet_rows(excel_file, max_row=None):
+    """
+    Raw cell values of a workbook's first sheet, header row first
+
+    .xlsx/.xlsm workbooks are streamed with openpyxl in read-only mode; other
+    formats (e.g. legacy .xls) openpyxl cannot open, so they are read whole
+    with pandas.read_excel and its installed engine instead. Fully empty rows
+    are skipped either way.
+    """
+    if os.path.splitext(str(excel_file))[1].lower() in OPENPYXL_EXTENSIONS:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(excel_file, read_only=True, data_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows(max_row=max_row, values_only=True):
+                if not all(value is None for value in row):
+                    yield row
+        finally:
+            workbook.close()
+    else:
+        import pandas as pd
+
+        df = pd.read_excel(excel_file, header=None, nrows=max_row, dtype=object, keep_default_na=False)
+        for row in df.itertuples(index=False, name=None):
+            row = tuple(None if value is None or value == '' or (isinstance(value, float) and value != value)
+                        else value for value in row)
+            if not all(value is None for value in row):
+                yield row
+
+
+def _sql_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    return value
+
+
+def load_excel_table(conn, excel_file, key_columns=()):
+    """
+    Load the first sheet of a workbook into the database once
+
+    Rows are inserted in batches as iter_sheet_rows yields them, so an .xlsx
+    sheet never has to fit in memory. Cells are stored as pandas.read_excel
+    reads them (cell_value).
+    The table is reused until the workbook's mtime or size change.
+
+    Parameters:
+    conn (sqlite3.Connection): Connection from connect()
+    excel_file (str): Path to the Excel file
+    key_columns (iterable): ID columns to index (e.g. KEDB, ServicenowID)
+
+    Returns:
+    tuple: (table name, list of column names)
+    """
+    path = os.path.abspath(excel_file)
+    stat = os.stat(path)
+    table = f"src{LOADER_VERSION}_{zlib.crc32(path.encode('utf-8')):08x}"
+
+    cached = conn.execute(
+        "SELECT table_name, mtime, size FROM _sources WHERE path = ?", (path,)
+    ).fetchone()
+
+    if cached is not None and cached[0] != table:
+        # Loaded by an older loader version
+        conn.execute(f"DROP TABLE IF EXISTS {quote(cached[0])}")
+        cached = None
+
+    if cached is None or cached[1] != stat.st_mtime or cached[2] != stat.st_size:
+        print(f"🗄️ Loading {excel_file} into the database...")
+        rows = iter_sheet_rows(path)
+        try:
+            columns = header_names(trim_header(next(rows, ())))
+
+            conn.execute(f"DROP TABLE IF EXISTS {quote(table)}")
+            conn.execute(f"CREATE TABLE {quote(table)} ({', '.join(quote(col) for col in columns)})")
+
+            insert = f"INSERT INTO {quote(table)} VALUES ({', '.join('?' for _ in columns)})"
+            batch = []
+            for row in rows:
+                row = [_sql_value(cell_value(value)) for value in row[:len(columns)]]
+                row += [None] * (len(columns) - len(row))
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    conn.executemany(insert, batch)
+                    batch = []
+            if batch:
+                conn.executemany(insert, batch)
+        finally:
+            rows.close()
+
+        conn.execute(
+            "INSERT OR REPLACE INTO _sources (path, table_name, mtime, size) VALUES (?, ?, ?, ?)",
+            (path, table, stat.st_mtime, stat.st_size)
+        )
+        conn.commit()
+
+    columns = table_columns(conn, table)
+    for column in key_columns:
+        if column in columns:
+            create_key_index(conn, table, column)
+
+    return table, columns
+
+
+def _index_name(table, column, suffix=''):
+    return f"idx_{table}_key_{re.sub(r'[^0-9A-Za-z_]', '_', column)}{suffix}"
+
+
+def add_key_column(conn, table, column):
+    """Store the stripped-string form of an ID column once, if not stored yet"""
+    name = key_column(column)
+    existing = [row[1] for row in conn.execute(f"PRAGMA table_info({quote(table)})")]
+    if name not in existing:
+        conn.execute(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(name)} TEXT")
+        conn.execute(f"UPDATE {quote(table)} SET {quote(name)} = kedb_strip({quote(column)})")
+        conn.commit()
+
+
+def create_key_index(conn, table, column, nocase=False):
+    """
+    Store and index the stripped-string form of an ID column (used by joins, groupbys
+    and lookups); nocase=True adds the case-insensitive index used by find_rows_containing
+    """
+    add_key_column(conn, table, column)
+    collate = ' COLLATE NOCASE' if nocase else ''
+    index_name = _index_name(table, column, '_nocase' if nocase else '')
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(index_name)} ON {quote(table)} ({key_expr(column)}{collate})")
+    conn.commit()
+
+
+def table_columns(conn, table):
+    """Column names of a loaded table, in workbook order (stored key columns are hidden)"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({quote(table)})")
+            if not row[1].startswith(KEY_COLUMN_PREFIX)]
+
+
+def find_rows_containing(conn, table, column, text, columns, limit=2):
+    """
+    Rows matching an ID (case-insensitive), in workbook order
+
+    Rows whose stripped ID equals the stripped text are found through the
+    index; only when there are none is the column scanned for IDs containing
+    text, like pandas .str.contains(text, case=False). find_kedb_data and
+    kedb_lookup apply the same exact-match-first rule.
+    """
+    create_key_index(conn, table, column, nocase=True)
+    key = key_expr(column)
+    select = ', '.join(quote(col) for col in columns)
+
+    cursor = conn.execute(
+        f"SELECT {select} FROM {quote(table)} "
+        f"WHERE {key} = ? COLLATE NOCASE "
+        f"ORDER BY rowid LIMIT ?",
+        (str(text).strip(), limit)
+    )
+    rows = cursor.fetchall()
+
+    if not rows:
+        escaped = str(text).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        cursor = conn.execute(
+            f"SELECT {select} FROM {quote(table)} "
+            f"WHERE {key} LIKE ? ESCAPE '\\' "
+            f"ORDER BY rowid LIMIT ?",
+            (f"%{escaped}%", limit)
+        )
+        rows = cursor.fetchall()
+
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def iter_grouped_text(conn, table, key_column, text_column):
+    """
+    Stream (key, text) rows with non-null key and text, ordered by stripped key
+    and then workbook order, so groups can be combined one at a time
+    """
+    key = key_expr(key_column)
+    return conn.execute(
+        f"SELECT {key}, CAST({quote(text_column)} AS TEXT) FROM {quote(table)} "
+        f"WHERE {quote(key_column)} IS NOT NULL AND {quote(text_column)} IS NOT NULL "
+        f"ORDER BY {key}, rowid"
+    )
+
+
+def merged_query(conn, left_table, right_table, left_key, right_key, left_required, right_required):
+    """
+    SQL equivalent of the test.py inner merge of the KEDB sheet with the resolution sheet
+
+    Both keys are stripped strings, null rows in the required columns are dropped,
+    overlapping column names get pandas' _x/_y suffixes, and rows come back in
+    left-then-right workbook order like pd.merge(how='inner').
+
+    Returns:
+    tuple: (SQL text, list of output column names)
+    """
+    left_columns = table_columns(conn, left_table)
+    right_columns = table_columns(conn, right_table)
+    overlap = set(left_columns) & set(right_columns)
+
+    select = []
+    names = []
+    for table, columns, key, suffix in ((left_table, left_columns, left_key, '_x'),
+                                        (right_table, right_columns, right_key, '_y')):
+        for col in columns:
+            name = col + suffix if col in overlap else col
+            expr = key_expr(col, table) if col == key else f"{quote(table)}.{quote(col)}"
+            select.append(f"{expr} AS {quote(name)}")
+            names.append(name)
+
+    conditions = [f"{quote(left_table)}.{quote(col)} IS NOT NULL" for col in left_required]
+    conditions += [f"{quote(right_table)}.{quote(col)} IS NOT NULL" for col in right_required]
+
+    sql = (
+        f"SELECT {', '.join(select)} FROM {quote(left_table)} "
+        f"JOIN {quote(right_table)} ON {key_expr(left_key, left_table)} = {key_expr(right_key, right_table)} "
+        f"WHERE {' AND '.join(conditions) or '1'} "
+        f"ORDER BY {quote(left_table)}.rowid, {quote(right_table)}.rowid"
+    )
+    return sql, names
@@ -0,0 +1,288 @@
+import json
+import math
+import os
+import pickle
+import re
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+
+INDEX_VERSION = 3
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    """Lower-case text and split it into alphanumeric tokens (underscores split too)"""
+    if text is None:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def index_kedb_rows(rows):
+    """
+    Build the BM25 inverted index from (ServicenowID, short_description, Description) rows
+
+    Parameters:
+    rows (iterable): Tuples of (ServicenowID, short_description, Description)
+
+    Returns:
+    dict: The index without source file metadata
+    """
+    docs = []
+    doc_lengths = []
+    postings = defaultdict(list)
+
+    for servicenow_id, short_description, description in rows:
+        short_description = str(short_description).strip()
+        description = str(description).strip()
+
+        doc_id = len(docs)
+        docs.append((str(servicenow_id).strip(), short_description, description))
+
+        terms = tokenize(short_description) + tokenize(description)
+        doc_lengths.append(len(terms))
+        for term, tf in Counter(terms).items():
+            postings[term].append((doc_id, tf))
+
+    total_docs = len(docs)
+    avg_length = (sum(doc_lengths) / total_docs) if total_docs else 0.0
+
+    # The BM25 weight of a posting does not depend on the query, so precompute it
+    # per term as (doc_ids, weights) arrays; a query is then one scatter-add per term
+    length_norms = BM25_K1 * (1 - BM25_B + BM25_B * np.asarray(doc_lengths, dtype=np.float64) / (avg_length or 1.0))
+    weighted_postings = {}
+    for term, plist in postings.items():
+        idf = math.log(1 + (total_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+        doc_ids = np.fromiter((doc_id for doc_id, _ in plist), dtype=np.int32, count=len(plist))
+        tfs = np.fromiter((tf for _, tf in plist), dtype=np.float64, count=len(plist))
+        weights = idf * tfs * (BM25_K1 + 1) / (tfs + length_norms[doc_ids])
+        weighted_postings[term] = (doc_ids, weights.astype(np.float32))
+
+    return {
+        'version': INDEX_VERSION,
+        'docs': docs,
+        'postings': weighted_postings,
+    }
+
+
+def build_kedb_index(excel_file):
+    """
+    Build a BM25 inverted index over short_description and Description of the KEDB workbook
+
+    Parameters:
+    excel_file (str): Path to the KEDB Excel file
+
+    Returns:
+    dict: The index, or None if the workbook could not be read
+    """
+    import pandas as pd
+
+    from kedb_io import read_kedb_excel
+
+    required_columns = ['ServicenowID', 'short_description', 'Description']
+    try:
+        df = read_kedb_excel(
+            excel_file,
+            id_columns=['ServicenowID'],
+            text_columns=['short_description', 'Description']
+        )
+    except FileNotFoundError:
+        print(f"Error: File '{excel_file}' not found")
+        return None
+    except Exception as e:
+        print(f"Error reading Excel file: {str(e)}")
+        return None
+
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        print(f"Error: Missing columns in Excel file: {missing_columns}")
+        return None
+
+    df = df[required_columns].dropna(subset=['ServicenowID'])
+    rows = (
+        (servicenow_id,
+         '' if pd.isna(short_description) else short_description,
+         '' if pd.isna(description) else description)
+        for servicenow_id, short_description, description in df.itertuples(index=False, name=None)
+    )
+    index = index_kedb_rows(rows)
+
+    stat = os.stat(excel_file)
+    index.update({
+        'source': os.path.abspath(excel_file),
+        'source_mtime': stat.st_mtime,
+        'source_size': stat.st_size,
+    })
+    return index
+
+
+def save_kedb_index(index, index_file):
+    """Persist the index so startup does not need to re-tokenize the corpus"""
+    tmp_file = index_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, index_file)
+
+
+def load_kedb_index(excel_file, index_file):
+    """
+    Load the persisted index, rebuilding it if it is missing or older than the workbook
+
+    Parameters:
+    excel_file (str): Path to the KEDB Excel file
+    index_file (str): Path to the persisted index
+
+    Returns:
+    dict: The index, or None if it could not be loaded or built
+    """
+    if os.path.exists(index_file):
+        try:
+            with open(index_file, 'rb') as f:
+                index = pickle.load(f)
+
+            stale = False
+            if index.get('version') != INDEX_VERSION:
+                stale = True
+            elif os.path.exists(excel_file):
+                stat = os.stat(excel_file)
+                stale = (stat.st_mtime != index['source_mtime'] or stat.st_size != index['source_size'])
+
+            if not stale:
+                return index
+            print(f"Index '{index_file}' is stale, rebuilding...")
+        except Exception as e:
+            print(f"Error loading index '{index_file}': {str(e)}, rebuilding...")
+
+    index = build_kedb_index(excel_file)
+    if index is not None:
+        save_kedb_index(index, index_file)
+    return index
+
+
+def suggest_kedbs(index, description, limit=10):
+    """
+    Rank KEDBs for an incident description with BM25
+
+    Parameters:
+    index (dict): Index returned by build_kedb_index / load_kedb_index
+    description (str): Incident description
+    limit (int): Maximum number of KEDBs to return
+
+    Returns:
+    list: KEDB dictionaries in the /api/suggested-kedbs response format
+    """
+    if limit is None or limit <= 0:
+        return []
+
+    postings = index['postings']
+    scores = None
+    for term, query_tf in Counter(tokenize(description)).items():
+        plist = postings.get(term)
+        if plist is None:
+            continue
+        if scores is None:
+            scores = np.zeros(len(index['docs']), dtype=np.float32)
+        doc_ids, weights = plist
+        scores[doc_ids] += query_tf * weights
+
+    if scores is None:
+        return []
+
+    # Only candidates scoring at least the limit-th best score are sorted;
+    # ties are broken by document order
+    matched = np.flatnonzero(scores > 0)
+    if len(matched) > limit:
+        cutoff = np.partition(scores[matched], len(matched) - limit)[len(matched) - limit]
+        matched = matched[scores[matched] >= cutoff]
+    top = matched[np.lexsort((matched, -scores[matched]))][:limit]
+
+    kedbs = []
+    for rank, doc_id in enumerate(top):
+        score = float(scores[doc_id])
+        servicenow_id, short_description, description_text = index['docs'][doc_id]
+        kedbs.append({
+            'id': servicenow_id,
+            'title': short_description,
+            'recommended': rank == 0,
+            'content': description_text,
+            'score': round(score, 4)
+        })
+
+    return kedbs
+
+
+def make_handler(index):
+    """Create a request handler serving POST /api/suggested-kedbs from the given index"""
+
+    class SuggestedKedbsHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.end_headers()
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/api/suggested-kedbs':
+                self._send_json(404, {'error': 'Not found'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(request, dict):
+                    raise ValueError('request body must be a JSON object')
+                description = str(request.get('description') or '')
+                limit = int(request.get('limit', 10))
+            except (ValueError, TypeError) as e:
+                self._send_json(400, {'error': f'Invalid request: {str(e)}'})
+                return
+
+            print(f"Finding KEDBs for: {description}")
+            self._send_json(200, {'kedbs': suggest_kedbs(index, description, limit)})
+
+    return SuggestedKedbsHandler
+
+
+def serve(index, host='localhost', port=3002):
+    """Serve POST /api/suggested-kedbs on a local HTTP endpoint"""
+    server = HTTPServer((host, port), make_handler(index))
+    print(f"KEDB suggestion server running on http://{host}:{port}")
+    print('Available endpoints:')
+    print('  POST /api/suggested-kedbs')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# Main execution
+if __name__ == "__main__":
+    excel_file = "kedb_data.xlsx"
+    index_file = "kedb_index.pkl"
+
+    print("🚀 Loading KEDB suggestion index...")
+    kedb_index = load_kedb_index(excel_file, index_file)
+
+    if kedb_index is None:
+        print("❌ Could not load or build the KEDB index.")
+        exit(1)
+
+    print(f"📄 Indexed {len(kedb_index['docs'])} KEDBs, {len(kedb_index['postings'])} terms")
+    serve(kedb_index)
@@ -1,145 +1,292 @@
 import pandas as pd
 import re
+import random
+import hashlib
+import heapq
 from collections import defaultdict, Counter
 import os
+import kedb_sql
+from kedb_io import read_kedb_excel
+from issue_type_router import (
+    new_router_state, add_router_sample, build_issue_type_router,
+    save_issue_type_router, router_path_for, ISSUE_TYPE_PLACEHOLDER
+)
+
+# Compact prompt settings
+DEFAULT_PROMPT_TOKEN_BUDGET = 1500
+CHARS_PER_TOKEN = 4
+SHARED_INSTRUCTIONS_ISSUE_TYPE = ISSUE_TYPE_PLACEHOLDER
+
+# Bounded per-issue-type aggregates
+DESCRIPTION_SAMPLE_SIZE = 10
+TOP_K_CAPACITY = 100
+DISTINCT_SKETCH_SIZE = 256
+
+# Output format instructions shared by every issue type's prompt
+RESOLUTION_INSTRUCTIONS_TEMPLATE = """**INSTRUCTION:** When provided with a short description of a {issue_type} issue, analyze it and generate a resolution following this EXACT format:
 
-def process_resolution_data_with_enhanced_prompts(sheet1_path, excel2_path, output_file):
+---
+**RESOLUTION STEPS:**
+
+**Root Cause:**
+[Identify the most likely root cause based on the description and historical data]
+
+**Resolution Steps:**
+1. [First step - be specific and actionable]
+2. [Second step - include exact commands/settings where applicable]
+3. [Continue with numbered steps]
+[Add more steps as needed]
+
+**Expected Outcome:**
+[What the user should see/expect after completing the steps]
+
+**Alternative Solution (if primary solution fails):**
+1. [Alternative step 1]
+2. [Alternative step 2]
+[Continue as needed]
+
+**Prevention:**
+[Specific steps to prevent this issue from recurring]
+
+**Estimated Resolution Time:** [X minutes/hours]
+
+**Prerequisites:** [Any specific permissions, tools, or access required]
+
+**Important Notes/Warnings:**
+[Any critical warnings or considerations]
+---
+
+**RESPONSE REQUIREMENTS:**
+1. Use ONLY the knowledge from the unique steps and patterns provided above
+2. Be specific with commands, file paths, and settings
+3. Include estimated time for each major step
+4. Provide clear success criteria for each step
+5. Always include prevention measures
+6. Format exactly as shown above
+7. Adapt the resolution steps to match the specific problem description provided
+
+**QUALITY CRITERIA:**
+- Steps must be actionable and specific
+- Use historical successful resolution patterns
+- Include troubleshooting for common failure points
+- Provide clear success/failure indicators for each step
+
+Ready to generate accurate {issue_type} resolutions. Provide the short description to get started."""
+
+def process_resolution_data_with_enhanced_prompts(sheet1_path, excel2_path, output_file,
+                                                  compact=False, token_budget=DEFAULT_PROMPT_TOKEN_BUDGET,
+                                                  db_file=None):
     """
     Enhanced version that creates highly accurate prompts based on unique resolution steps
     and generates responses in the specific format shown in the reference image
+
+    With compact=True, each prompt only holds the issue-type knowledge, ranked by
+    frequency and trimmed to fit token_budget together with the shared instructions.
+    With db_file, both sheets are loaded into an embedded database once and merged
+    with out-of-core SQL; merged rows are then processed a chunk at a time and
+    written to <output>_source_data.csv instead of the Source_Data sheet.
     """
     
+    if compact:
+        shared_tokens = estimate_tokens(shared_resolution_instructions())
+        if token_budget <= shared_tokens:
+            print(f"❌ Error: token_budget ({token_budget}) must exceed the ~{shared_tokens} tokens of the shared instructions")
+            return None
+    
+    conn = None
     try:
         # Read both Excel files
         print("📊 Reading Excel files...")
         
-        sheet1_df = pd.read_excel(sheet1_path)
-        excel2_df = pd.read_excel(excel2_path)
+        if db_file:
+            conn = kedb_sql.connect(db_file)
+            sheet1_table, sheet1_columns = kedb_sql.load_excel_table(conn, sheet1_path, key_columns=['KEDB'])
+            excel2_table, excel2_columns = kedb_sql.load_excel_table(conn, excel2_path, key_columns=['servicenow_id'])
+            sheet1_count = conn.execute(f"SELECT COUNT(*) FROM {kedb_sql.quote(sheet1_table)}").fetchone()[0]
+            excel2_count = conn.execute(f"SELECT COUNT(*) FROM {kedb_sql.quote(excel2_table)}").fetchone()[0]
+        else:
+            # Every column is kept for the Source_Data sheet; IDs and issue_type are stored compactly
+            sheet1_df = read_kedb_excel(
+                sheet1_path,
+                id_columns=['KEDB'],
+                category_columns=['issue_type'],
+                other_columns=True
+            )
+            excel2_df = read_kedb_excel(
+                excel2_path,
+                id_columns=['servicenow_id'],
+                other_columns=True
+            )
+            sheet1_columns, sheet1_count = list(sheet1_df.columns), len(sheet1_df)
+            excel2_columns, excel2_count = list(excel2_df.columns), len(excel2_df)
         
-        print(f"📄 Sheet1 loaded: {len(sheet1_df)} records")
-        print(f"📄 Excel2 loaded: {len(excel2_df)} records")
+        print(f"📄 Sheet1 loaded: {sheet1_count} records")
+        print(f"📄 Excel2 loaded: {excel2_count} records")
         
         # Validate required columns
         required_sheet1_cols = ['KEDB', 'issue_type']
         required_excel2_cols = ['servicenow_id', 'resolution']
         
         # Check if short_description exists
-        has_short_description = 'short_description' in sheet1_df.columns
+        has_short_description = 'short_description' in sheet1_columns
         if has_short_description:
             required_sheet1_cols.append('short_description')
         
         # Validate columns
         for col in required_sheet1_cols:
-            if col not in sheet1_df.columns:
+            if col not in sheet1_columns:
                 print(f"❌ Error: Column '{col}' not found in sheet1.xlsx")
                 return None
         
         for col in required_excel2_cols:
-            if col not in excel2_df.columns:
+            if col not in excel2_columns:
                 print(f"❌ Error: Column '{col}' not found in excel2.xlsx")
                 return None
         
-        # Clean and merge data
-        sheet1_clean = sheet1_df.dropna(subset=['KEDB', 'issue_type']).copy()
-        excel2_clean = excel2_df.dropna(subset=['servicenow_id', 'resolution']).copy()
-        
-        sheet1_clean['KEDB'] = sheet1_clean['KEDB'].astype(str).str.strip()
-        excel2_clean['servicenow_id'] = excel2_clean['servicenow_id'].astype(str).str.strip()
-        
-        # Merge dataframes
-        merged_df = pd.merge(
-            sheet1_clean, 
-            excel2_clean, 
-            left_on='KEDB', 
-            right_on='servicenow_id', 
-            how='inner'
-        )
+        if db_file:
+            # Join, null filtering and key cleaning run inside the database
+            merged_sql, _ = kedb_sql.merged_query(
+                conn, sheet1_table, excel2_table, 'KEDB', 'servicenow_id',
+                ['KEDB', 'issue_type'], ['servicenow_id', 'resolution']
+            )
+            merged_count = conn.execute(f"SELECT COUNT(*) FROM ({merged_sql})").fetchone()[0]
+            
+            def iter_merged_chunks():
+                return pd.read_sql_query(merged_sql, conn, chunksize=kedb_sql.BATCH_SIZE)
+        else:
+            # Clean and merge data
+            # Keys are already stripped strings (read_kedb_excel)
+            sheet1_clean = sheet1_df.dropna(subset=['KEDB', 'issue_type'])
+            excel2_clean = excel2_df.dropna(subset=['servicenow_id', 'resolution'])
+            
+            # Merge dataframes
+            merged_df = pd.merge(
+                sheet1_clean, 
+                excel2_clean, 
+                left_on='KEDB', 
+                right_on='servicenow_id', 
+                how='inner'
+            )
+            merged_count = len(merged_df)
+            
+            def iter_merged_chunks():
+                return [merged_df]
         
-        print(f"✅ Found {len(merged_df)} matching records")
+        print(f"✅ Found {merged_count} matching records")
         
-        if merged_df.empty:
+        if merged_count == 0:
             print("❌ No matching records found")
             return None
         
         # Enhanced processing for unique resolution steps
         print(f"🔍 Analyzing unique resolution patterns...")
         
+        # Compact aggregates: memory stays flat regardless of corpus size
+        sample_rng = random.Random(0)
         issue_type_data = defaultdict(lambda: {
-            'resolutions': [],
-            'descriptions': [],
-            'unique_steps': set(),
-            'step_patterns': [],
-            'root_causes': [],
-            'prevention_steps': []
+            'resolution_count': 0,
+            'description_count': 0,
+            'descriptions': [],          # reservoir sample
+            'step_counts': Counter(),    # top-K sketch
+            'distinct_steps': new_distinct_sketch(),
+            'step_patterns': Counter(),
+            'root_causes': Counter(),    # top-K sketch
+            'prevention_steps': Counter()  # top-K sketch
         })
+        router_state = new_router_state()
         
         # Process each record to extract detailed information
-        for _, row in merged_df.iterrows():
-            issue_type = row['issue_type']
-            resolution = str(row['resolution']).strip()
-            
-            if resolution and resolution.lower() not in ['nan', 'none', '']:
-                issue_type_data[issue_type]['resolutions'].append(resolution)
+        for chunk in iter_merged_chunks():
+            for _, row in chunk.iterrows():
+                issue_type = row['issue_type']
+                resolution = str(row['resolution']).strip()
                 
-                # Extract unique steps from resolution
-                unique_steps = extract_resolution_steps(resolution)
-                issue_type_data[issue_type]['unique_steps'].update(unique_steps)
+                if resolution and resolution.lower() not in ['nan', 'none', '']:
+                    issue_type_data[issue_type]['resolution_count'] += 1
                 
-                # Extract patterns
-                patterns = extract_resolution_patterns(resolution)
-                issue_type_data[issue_type]['step_patterns'].extend(patterns)
+                    # Extract unique steps from resolution
+                    unique_steps = extract_resolution_steps(resolution)
+                    update_top_k(issue_type_data[issue_type]['step_counts'], unique_steps)
+                    update_distinct_sketch(issue_type_data[issue_type]['distinct_steps'], unique_steps)
                 
-                # Extract root causes if mentioned
-                root_causes = extract_root_causes(resolution)
-                issue_type_data[issue_type]['root_causes'].extend(root_causes)
+                    # Extract patterns
+                    patterns = extract_resolution_patterns(resolution)
+                    issue_type_data[issue_type]['step_patterns'].update(patterns)
                 
-                # Extract prevention steps if mentioned
-                prevention = extract_prevention_steps(resolution)
-                issue_type_data[issue_type]['prevention_steps'].extend(prevention)
-            
-            if has_short_description and pd.notna(row['short_description']):
-                description = str(row['short_description']).strip()
-                if description and description.lower() not in ['nan', 'none', '']:
-                    issue_type_data[issue_type]['descriptions'].append(description)
+                    # Extract root causes if mentioned
+                    root_causes = extract_root_causes(resolution)
+                    update_top_k(issue_type_data[issue_type]['root_causes'], root_causes)
+                
+                    # Extract prevention steps if mentioned
+                    prevention = extract_prevention_steps(resolution)
+                    update_top_k(issue_type_data[issue_type]['prevention_steps'], prevention)
+                
+                if has_short_description and pd.notna(row['short_description']):
+                    description = str(row['short_description']).strip()
+                    if description and description.lower() not in ['nan', 'none', '']:
+                        reservoir_sample(issue_type_data[issue_type], description, sample_rng)
+                        add_router_sample(router_state, issue_type, description)
         
         # Generate enhanced prompts
         prompt_data = []
+        shared_instructions = shared_resolution_instructions() if compact else None
         
         for issue_type, data in issue_type_data.items():
             # Process unique steps
-            unique_steps_list = list(data['unique_steps'])
-            common_patterns = Counter(data['step_patterns']).most_common(10)
-            common_root_causes = Counter(data['root_causes']).most_common(5)
-            common_prevention = Counter(data['prevention_steps']).most_common(5)
+            unique_steps_list = [step for step, _ in data['step_counts'].most_common()]
+            unique_step_count = estimate_distinct(data['distinct_steps'])
+            common_patterns = data['step_patterns'].most_common(10)
+            common_root_causes = data['root_causes'].most_common(5)
+            common_prevention = data['prevention_steps'].most_common(5)
             
             # Generate the enhanced prompt
-            enhanced_prompt = generate_enhanced_resolution_prompt(
-                issue_type, 
-                data['resolutions'],
-                unique_steps_list,
-                common_patterns,
-                common_root_causes,
-                common_prevention,
-                data['descriptions'][:10] if data['descriptions'] else []
-            )
+            if compact:
+                # Budget against the instructions as sent for this issue type
+                instruction_tokens = estimate_tokens(
+                    shared_instructions.replace(SHARED_INSTRUCTIONS_ISSUE_TYPE, str(issue_type))
+                )
+                enhanced_prompt = generate_compact_resolution_prompt(
+                    issue_type,
+                    data['step_counts'].most_common(),
+                    common_patterns,
+                    common_root_causes,
+                    common_prevention,
+                    data['descriptions'][:10] if data['descriptions'] else [],
+                    token_budget - instruction_tokens
+                )
+                prompt_tokens = estimate_tokens(enhanced_prompt) + instruction_tokens
+            else:
+                enhanced_prompt = generate_enhanced_resolution_prompt(
+                    issue_type, 
+                    data['resolution_count'],
+                    unique_steps_list,
+                    common_patterns,
+                    common_root_causes,
+                    common_prevention,
+                    data['descriptions'][:10] if data['descriptions'] else [],
+                    unique_step_count
+                )
+                prompt_tokens = estimate_tokens(enhanced_prompt)
             
             # Compile comprehensive resolution knowledge base
             knowledge_base = compile_resolution_knowledge_base(
-                data['resolutions'],
+                data['resolution_count'],
                 unique_steps_list,
                 common_patterns,
                 common_root_causes,
-                common_prevention
+                common_prevention,
+                unique_step_count
             )
             
             prompt_data.append({
                 'issue_type': issue_type,
-                'total_resolutions': len(data['resolutions']),
-                'unique_resolution_steps': len(unique_steps_list),
+                'total_resolutions': data['resolution_count'],
+                'unique_resolution_steps': unique_step_count,
                 'common_patterns_count': len(common_patterns),
                 'knowledge_base': knowledge_base,
                 'sample_descriptions': '\n'.join(data['descriptions'][:5]) if data['descriptions'] else 'N/A',
                 'enhanced_ai_prompt': enhanced_prompt,
+                'estimated_prompt_tokens': prompt_tokens,
                 'unique_steps_list': '; '.join(unique_steps_list[:20])  # First 20 unique steps
             })
         
@@ -150,11 +297,38 @@ def process_resolution_data_with_enhanced_prompts(sheet1_path, excel2_path, outp
         # Save to Excel
         with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
             prompt_df.to_excel(writer, sheet_name='Enhanced_Resolution_Prompts', index=False)
-            merged_df.to_excel(writer, sheet_name='Source_Data', index=False)
+            if not db_file:
+                merged_df.to_excel(writer, sheet_name='Source_Data', index=False)
             create_enhanced_summary(prompt_df, writer)
+            if compact:
+                pd.DataFrame([{'shared_instructions': shared_instructions}]).to_excel(
+                    writer, sheet_name='Shared_Instructions', index=False
+                )
+        
+        # openpyxl keeps a whole workbook in memory, so in db mode the merged rows
+        # are streamed to a CSV next to the prompts instead of a Source_Data sheet
+        if db_file:
+            source_data_file = os.path.splitext(output_file)[0] + '_source_data.csv'
+            header = True
+            for chunk in iter_merged_chunks():
+                chunk.to_csv(source_data_file, mode='w' if header else 'a', header=header, index=False)
+                header = False
+        
+        # Save the issue-type router alongside the prompts
+        router = build_issue_type_router(
+            router_state,
+            dict(zip(prompt_df['issue_type'], prompt_df['enhanced_ai_prompt'])),
+            shared_instructions
+        )
+        if router is not None:
+            router_file = router_path_for(output_file)
+            save_issue_type_router(router, router_file)
+            print(f"🧭 Issue-type router saved to: {router_file}")
         
         print(f"\n✅ Enhanced processing complete!")
         print(f"💾 Enhanced prompts saved to: {output_file}")
+        if db_file:
+            print(f"💾 Source data saved to: {source_data_file}")
         
         # Display enhanced sample
         display_enhanced_sample(prompt_df)
@@ -163,6 +337,60 @@ def process_resolution_data_with_enhanced_prompts(sheet1_path, excel2_path, outp
         
     except Exception as e:
         print(f"❌ Error: {str(e)}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+def reservoir_sample(data, description, rng, sample_size=DESCRIPTION_SAMPLE_SIZE):
+    """Keep a uniform random sample of at most sample_size descriptions (reservoir sampling)"""
+    data['description_count'] += 1
+    if len(data['descriptions']) < sample_size:
+        data['descriptions'].append(description)
+    else:
+        slot = rng.randrange(data['description_count'])
+        if slot < sample_size:
+            data['descriptions'][slot] = description
+
+def update_top_k(counter, items, capacity=TOP_K_CAPACITY):
+    """
+    Space-Saving top-K sketch: count items in a Counter holding at most capacity keys.
+    A new item evicts the current minimum and inherits its count + 1, so frequent
+    items are never lost and counts are over-estimated by at most the evicted minimum.
+    """
+    for item in items:
+        if item in counter or len(counter) < capacity:
+            counter[item] += 1
+        else:
+            evicted = min(counter, key=counter.get)
+            counter[item] = counter.pop(evicted) + 1
+
+def new_distinct_sketch():
+    """Empty K-minimum-values sketch: max-heap (negated) of the smallest item hashes, plus a member set"""
+    return {'heap': [], 'members': set()}
+
+def update_distinct_sketch(sketch, items, capacity=DISTINCT_SKETCH_SIZE):
+    """Add items to a K-minimum-values sketch, keeping only the capacity smallest 64-bit hashes"""
+    heap, members = sketch['heap'], sketch['members']
+    for item in items:
+        h = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big')
+        if h in members:
+            continue
+        if len(heap) < capacity:
+            heapq.heappush(heap, -h)
+            members.add(h)
+        elif h < -heap[0]:
+            members.discard(-heapq.heappushpop(heap, -h))
+            members.add(h)
+
+def estimate_distinct(sketch):
+    """
+    Number of distinct items added to a K-minimum-values sketch: exact below the
+    sketch size, else (K - 1) / (K-th smallest hash as a fraction of the hash space)
+    """
+    heap = sketch['heap']
+    if len(heap) < DISTINCT_SKETCH_SIZE:
+        return len(heap)
+    return int(round((len(heap) - 1) * 2 ** 64 / -heap[0]))
 
 def extract_resolution_steps(resolution_text):
     """Extract individual resolution steps from resolution text"""
@@ -260,8 +488,14 @@ def extract_prevention_steps(resolution_text):
     
     return prevention
 
-def generate_enhanced_resolution_prompt(issue_type, resolutions, unique_steps, common_patterns, root_causes, prevention_steps, sample_descriptions):
-    """Generate enhanced AI prompt based on the reference format"""
+def generate_enhanced_resolution_prompt(issue_type, resolution_count, unique_steps, common_patterns, root_causes, prevention_steps, sample_descriptions, unique_step_count=None):
+    """
+    Generate enhanced AI prompt based on the reference format
+
+    unique_step_count is the number of distinct steps seen (unique_steps may be a top-K list)
+    """
+    if unique_step_count is None:
+        unique_step_count = len(unique_steps)
     
     # Format unique steps
     steps_text = '\n'.join([f"• {step}" for step in unique_steps[:30]])  # Top 30 unique steps
@@ -281,7 +515,7 @@ def generate_enhanced_resolution_prompt(issue_type, resolutions, unique_steps, c
     enhanced_prompt = f"""You are an expert IT support specialist with extensive knowledge of {issue_type} issues. Based on comprehensive analysis of historical resolution data, generate detailed resolution steps following the EXACT format below.
 
 **ISSUE TYPE:** {issue_type}
-**KNOWLEDGE BASE - UNIQUE RESOLUTION STEPS ({len(unique_steps)} steps analyzed):**
+**KNOWLEDGE BASE - UNIQUE RESOLUTION STEPS ({unique_step_count} steps analyzed):**
 {steps_text}
 
 **COMMON RESOLUTION PATTERNS:**
@@ -296,66 +530,78 @@ def generate_enhanced_resolution_prompt(issue_type, resolutions, unique_steps, c
 **SAMPLE PROBLEM DESCRIPTIONS:**
 {descriptions_text}
 
-**INSTRUCTION:** When provided with a short description of a {issue_type} issue, analyze it and generate a resolution following this EXACT format:
-
----
-**RESOLUTION STEPS:**
-
-**Root Cause:**
-[Identify the most likely root cause based on the description and historical data]
-
-**Resolution Steps:**
-1. [First step - be specific and actionable]
-2. [Second step - include exact commands/settings where applicable]
-3. [Continue with numbered steps]
-[Add more steps as needed]
-
-**Expected Outcome:**
-[What the user should see/expect after completing the steps]
-
-**Alternative Solution (if primary solution fails):**
-1. [Alternative step 1]
-2. [Alternative step 2]
-[Continue as needed]
-
-**Prevention:**
-[Specific steps to prevent this issue from recurring]
+{RESOLUTION_INSTRUCTIONS_TEMPLATE.format(issue_type=issue_type)}"""
 
-**Estimated Resolution Time:** [X minutes/hours]
+    return enhanced_prompt
 
-**Prerequisites:** [Any specific permissions, tools, or access required]
+def estimate_tokens(text):
+    """Rough LLM token estimate (~4 characters per token)"""
+    if not text:
+        return 0
+    return -(-len(text) // CHARS_PER_TOKEN)
 
-**Important Notes/Warnings:**
-[Any critical warnings or considerations]
----
+def shared_resolution_instructions():
+    """Instruction block stored once and sent after every compact prompt"""
+    return RESOLUTION_INSTRUCTIONS_TEMPLATE.format(issue_type=SHARED_INSTRUCTIONS_ISSUE_TYPE)
 
-**RESPONSE REQUIREMENTS:**
-1. Use ONLY the knowledge from the unique steps and patterns provided above
-2. Be specific with commands, file paths, and settings
-3. Include estimated time for each major step
-4. Provide clear success criteria for each step
-5. Always include prevention measures
-6. Format exactly as shown above
-7. Adapt the resolution steps to match the specific problem description provided
-
-**QUALITY CRITERIA:**
-- Steps must be actionable and specific
-- Use historical successful resolution patterns
-- Include troubleshooting for common failure points
-- Provide clear success/failure indicators for each step
-
-Ready to generate accurate {issue_type} resolutions. Provide the short description to get started."""
+def generate_compact_resolution_prompt(issue_type, step_counts, common_patterns, root_causes, prevention_steps, sample_descriptions, token_budget):
+    """
+    Generate a compact prompt holding only the issue-type knowledge
 
-    return enhanced_prompt
+    Sections are filled rank by rank (most frequent entry of every section first,
+    then the second, ...) until the token budget is used up, so the least
+    frequent steps, causes and prevention lines are the ones trimmed.
+    """
+    header = (f"You are an expert IT support specialist for {issue_type} issues. "
+              f"Historical resolution knowledge, most frequent first:\n\n"
+              f"**ISSUE TYPE:** {issue_type}")
+
+    sections = [
+        ('COMMON RESOLUTION PATTERNS', [f"• {pattern} ({count})" for pattern, count in common_patterns]),
+        ('RESOLUTION STEPS', [f"• {step} ({count})" for step, count in step_counts]),
+        ('IDENTIFIED ROOT CAUSES', [f"• {cause} ({count})" for cause, count in root_causes]),
+        ('PREVENTION STRATEGIES', [f"• {prev} ({count})" for prev, count in prevention_steps]),
+        ('SAMPLE PROBLEM DESCRIPTIONS', [f"- {desc}" for desc in sample_descriptions]),
+    ]
 
-def compile_resolution_knowledge_base(resolutions, unique_steps, patterns, root_causes, prevention_steps):
-    """Compile comprehensive knowledge base"""
+    remaining = token_budget - estimate_tokens(header)
+    if remaining < 0:
+        print(f"⚠️ Warning: token budget too small for {issue_type}; prompt holds the header only")
+    selected = [[] for _ in sections]
+    max_rank = max((len(lines) for _, lines in sections), default=0)
+
+    for rank in range(max_rank):
+        added = False
+        for i, (title, lines) in enumerate(sections):
+            if rank >= len(lines) or len(selected[i]) < rank:
+                continue
+            cost = estimate_tokens(lines[rank] + "\n")
+            if not selected[i]:
+                cost += estimate_tokens(f"\n\n**{title}:**\n")
+            if cost <= remaining:
+                selected[i].append(lines[rank])
+                remaining -= cost
+                added = True
+        if not added:
+            break
+
+    parts = [header]
+    for (title, _), lines in zip(sections, selected):
+        if lines:
+            parts.append(f"**{title}:**\n" + '\n'.join(lines))
+
+    return '\n\n'.join(parts)
+
+def compile_resolution_knowledge_base(resolution_count, unique_steps, patterns, root_causes, prevention_steps, unique_step_count=None):
+    """Compile comprehensive knowledge base (unique_step_count as in generate_enhanced_resolution_prompt)"""
+    if unique_step_count is None:
+        unique_step_count = len(unique_steps)
     
     knowledge_base = f"""
 === COMPREHENSIVE KNOWLEDGE BASE ===
 
-TOTAL RESOLUTIONS ANALYZED: {len(resolutions)}
-UNIQUE STEPS IDENTIFIED: {len(unique_steps)}
+TOTAL RESOLUTIONS ANALYZED: {resolution_count}
+UNIQUE STEPS IDENTIFIED: {unique_step_count}
 
 TOP RESOLUTION STEPS:
 {chr(10).join([f"• {step}" for step in unique_steps[:15]])}
@@ -384,7 +630,8 @@ def create_enhanced_summary(prompt_df, writer):
             'unique_steps_extracted': row['unique_resolution_steps'],
             'pattern_diversity': row['common_patterns_count'],
             'knowledge_richness_score': (row['unique_resolution_steps'] * row['common_patterns_count']) // row['total_resolutions'] if row['total_resolutions'] > 0 else 0,
-            'prompt_accuracy_potential': 'High' if row['unique_resolution_steps'] > 20 else 'Medium' if row['unique_resolution_steps'] > 10 else 'Low'
+            'prompt_accuracy_potential': 'High' if row['unique_resolution_steps'] > 20 else 'Medium' if row['unique_resolution_steps'] > 10 else 'Low',
+            'estimated_prompt_tokens': row['estimated_prompt_tokens']
         })
     
     summary_df = pd.DataFrame(summary_data)
@@ -413,12 +660,17 @@ def display_enhanced_sample(prompt_df):
     print(f"   • Prevention measures")
     print(f"   • Time estimates")
 
-def create_format_specific_prompt_files(prompt_df, output_folder):
+def create_format_specific_prompt_files(prompt_df, output_folder, shared_instructions=None):
     """Create individual prompt files optimized for the specific format"""
     
     try:
         os.makedirs(output_folder, exist_ok=True)
         
+        # Compact prompts share one instruction block instead of repeating it per file
+        if shared_instructions:
+            with open(f"{output_folder}/SHARED_INSTRUCTIONS.txt", 'w', encoding='utf-8') as f:
+                f.write(shared_instructions)
+        
         for _, row in prompt_df.iterrows():
             issue_type = row['issue_type']
             safe_filename = re.sub(r'[^\w\-_.]', '_', issue_type)
@@ -436,6 +688,7 @@ def create_format_specific_prompt_files(prompt_df, output_folder):
                 f.write(f"\nTotal Resolutions: {row['total_resolutions']}")
                 f.write(f"\nUnique Steps: {row['unique_resolution_steps']}")
                 f.write(f"\nPattern Diversity: {row['common_patterns_count']}")
+                f.write(f"\nEstimated Prompt Tokens: {row['estimated_prompt_tokens']}")
                 f.write(f"\n" + "="*50)
         
         print(f"📁 Format-specific prompt files saved to: {output_folder}/")
@@ -450,6 +703,9 @@ if __name__ == "__main__":
     excel2_file = "excel2.xlsx"
     output_excel = "enhanced_format_specific_prompts.xlsx"
     prompt_files_folder = "format_specific_prompts"
+    compact_prompts = False  # Set True for token-budgeted prompts with shared instructions
+    prompt_token_budget = DEFAULT_PROMPT_TOKEN_BUDGET
+    database_file = None  # e.g. "kedb_analysis.db" to join out-of-core in SQLite
     
     print("🚀 Starting Enhanced Resolution Prompt Generation (Format-Specific)...")
     print("=" * 80)
@@ -464,12 +720,19 @@ if __name__ == "__main__":
     result_df = process_resolution_data_with_enhanced_prompts(
         sheet1_file, 
         excel2_file, 
-        output_excel
+        output_excel,
+        compact=compact_prompts,
+        token_budget=prompt_token_budget,
+        db_file=database_file
     )
     
     if result_df is not None:
         # Create format-specific prompt files
-        create_format_specific_prompt_files(result_df, prompt_files_folder)
+        create_format_specific_prompt_files(
+            result_df,
+            prompt_files_folder,
+            shared_resolution_instructions() if compact_prompts else None
+        )
         
         print("\n" + "=" * 80)
         print("🎉 ENHANCED FORMAT-SPECIFIC PROCESSING COMPLETE!")